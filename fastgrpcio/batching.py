@@ -0,0 +1,107 @@
+import asyncio
+import logging
+from typing import Any, Callable
+
+import grpc
+from google.protobuf.field_mask_pb2 import FieldMask
+from grpc.aio._typing import MetadataType
+from pydantic import create_model
+
+from fastgrpcio.context import Context, GRPCContext
+from fastgrpcio.mixins import LazyInjected
+from fastgrpcio.schemas import BaseGRPCSchema
+
+logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S", level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class BatchItemAborted(Exception):
+    def __init__(self, code: grpc.StatusCode, details: str) -> None:
+        super().__init__(details)
+        self.code = code
+        self.details = details
+
+
+ITEM_RESPONSE_PATH = "results.response"
+
+
+def item_field_mask(field_mask: FieldMask | None) -> FieldMask | None:
+    # The batch call's mask names fields of the batch response; items see the part under each
+    # result's response, so context.wants() answers as it would for an unbatched call.
+    if field_mask is None:
+        return None
+    paths: list[str] = []
+    for path in field_mask.paths:
+        if path in ("results", ITEM_RESPONSE_PATH):
+            return None
+        if path.startswith(f"{ITEM_RESPONSE_PATH}."):
+            paths.append(path.removeprefix(f"{ITEM_RESPONSE_PATH}."))
+    return FieldMask(paths=paths)
+
+
+class BatchItemContext(Context):
+    __slots__ = ()
+
+    async def abort(self, code: grpc.StatusCode, details: str = "", trailing_metadata: MetadataType = ()) -> None:
+        raise BatchItemAborted(code, details)
+
+    async def abort_with_status(self, status: grpc.Status) -> None:
+        raise BatchItemAborted(status.code, status.details)
+
+
+def make_batch_function(
+    injected: LazyInjected,
+    request_model: type[BaseGRPCSchema],
+    response_model: type[BaseGRPCSchema],
+    batch_name: str,
+    concurrency: int,
+) -> Callable[..., Any]:
+    # The models are built at runtime, so their fields are unknown to the type checker.
+    items_type: Any = list[request_model]  # type: ignore[valid-type]
+    response_type: Any = response_model | None
+    batch_request: Any = create_model(
+        f"{batch_name}Request",
+        __base__=BaseGRPCSchema,
+        items=(items_type, ...),
+    )
+    batch_result: Any = create_model(
+        f"{batch_name}Result",
+        __base__=BaseGRPCSchema,
+        code=(int, 0),
+        details=(str | None, None),
+        response=(response_type, None),
+    )
+    results_type: Any = list[batch_result]
+    batch_response: Any = create_model(
+        f"{batch_name}Response",
+        __base__=BaseGRPCSchema,
+        results=(results_type, ...),
+    )
+
+    is_coroutine = injected.is_coroutine
+
+    async def run_item(item: BaseGRPCSchema, context: Context, semaphore: asyncio.Semaphore) -> Any:
+        item_context = BatchItemContext(context._context, context.trace_context)
+        item_context.field_mask = item_field_mask(context.field_mask)
+        async with semaphore:
+            try:
+                result = (
+                    await injected(item, context=item_context) if is_coroutine else injected(item, context=item_context)
+                )
+            except BatchItemAborted as e:
+                return batch_result(code=e.code.value[0], details=e.details)
+            except Exception as e:
+                logger.exception("[%s] - Batch item failed", batch_name)
+                return batch_result(
+                    code=grpc.StatusCode.UNKNOWN.value[0], details=f"Unexpected {type(e).__name__}: {e}"
+                )
+        return batch_result(code=grpc.StatusCode.OK.value[0], response=result)
+
+    async def batch_func(data: Any, context: GRPCContext) -> Any:
+        semaphore = asyncio.Semaphore(concurrency)
+        results = await asyncio.gather(*(run_item(item, context, semaphore) for item in data.items))
+        return batch_response(results=results)
+
+    batch_func.__name__ = batch_name
+    batch_func.__annotations__ = {"data": batch_request, "context": GRPCContext, "return": batch_response}
+    return batch_func
@@ -0,0 +1,147 @@
+import hashlib
+import mmap
+import os
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, BinaryIO, Iterator
+
+from fastgrpcio.exceptions import BlobIntegrityError
+from fastgrpcio.schemas import BaseGRPCSchema
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+BlobSource = bytes | bytearray | memoryview | str | os.PathLike[str]
+
+
+class BlobChunk(BaseGRPCSchema):
+    data: bytes
+    offset: int
+    total_size: int | None = None
+    checksum: str | None = None
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def encode_chunk(data: bytes | memoryview, offset: int, total_size: int, checksum: str | None = None) -> bytes:
+    # Wire format of BlobChunk: data=1 (bytes), offset=2, total_size=3 (int64), checksum=4 (string).
+    # Writing it by hand copies the payload once instead of through a model and a message.
+    parts: list[bytes | memoryview] = [
+        b"\x0a",
+        _varint(len(data)),
+        data,
+        b"\x10",
+        _varint(offset),
+        b"\x18",
+        _varint(total_size),
+    ]
+    if checksum is not None:
+        encoded_checksum = checksum.encode()
+        parts.extend((b"\x22", _varint(len(encoded_checksum)), encoded_checksum))
+    return b"".join(parts)
+
+
+@contextmanager
+def _open_view(source: BlobSource) -> Iterator[memoryview]:
+    if not isinstance(source, (str, os.PathLike)):
+        with memoryview(source).cast("B") as view:
+            yield view
+        return
+
+    with open(source, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            yield memoryview(b"")
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped, memoryview(mapped) as view:
+            yield view
+
+
+def iter_blob_chunks(source: BlobSource, chunk_size: int = DEFAULT_CHUNK_SIZE, offset: int = 0) -> Iterator[bytes]:
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer")
+
+    with _open_view(source) as view:
+        total_size = len(view)
+        if not 0 <= offset <= total_size:
+            raise ValueError(f"offset {offset} is outside of the blob of {total_size} bytes")
+
+        with view[:offset] as prefix:
+            digest = hashlib.sha256(prefix)
+        position = offset
+        while True:
+            end = min(position + chunk_size, total_size)
+            with view[position:end] as chunk:
+                digest.update(chunk)
+                checksum = digest.hexdigest() if end == total_size else None
+                yield encode_chunk(chunk, position, total_size, checksum)
+            position = end
+            if position >= total_size:
+                return
+
+
+async def stream_blob(
+    source: BlobSource,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    offset: int = 0,
+) -> AsyncIterator[bytes]:
+    for payload in iter_blob_chunks(source, chunk_size, offset):
+        yield payload
+
+
+class BlobAssembler:
+    def __init__(self, sink: BinaryIO | None = None) -> None:
+        self.sink = sink
+        self.offset = 0
+        self.total_size: int | None = None
+        self.complete = False
+        self._buffer = bytearray()
+        self._digest = hashlib.sha256()
+
+        if sink is not None:
+            sink.seek(0)
+            while block := sink.read(DEFAULT_CHUNK_SIZE * 16):
+                self._digest.update(block)
+                self.offset += len(block)
+
+    def feed(self, chunk: Any) -> None:
+        if self.complete:
+            raise BlobIntegrityError("Received a chunk after the blob was complete")
+        if chunk.offset != self.offset:
+            raise BlobIntegrityError(f"Expected a chunk at offset {self.offset}, got {chunk.offset}")
+
+        data = chunk.data
+        if self.sink is not None:
+            self.sink.write(data)
+        else:
+            self._buffer += data
+        self._digest.update(data)
+        self.offset += len(data)
+
+        if chunk.total_size:
+            self.total_size = chunk.total_size
+        if self.total_size is not None and self.offset > self.total_size:
+            raise BlobIntegrityError(f"Received {self.offset} bytes of a {self.total_size} byte blob")
+
+        if chunk.checksum:
+            if self.total_size is not None and self.offset != self.total_size:
+                raise BlobIntegrityError(f"Final chunk ends at {self.offset} of {self.total_size} bytes")
+            if self._digest.hexdigest() != chunk.checksum:
+                raise BlobIntegrityError("Blob checksum does not match")
+            self.complete = True
+            if self.sink is not None:
+                self.sink.flush()
+
+    async def consume(self, chunks: AsyncIterator[Any]) -> "BlobAssembler":
+        async for chunk in chunks:
+            self.feed(chunk)
+        if not self.complete:
+            raise BlobIntegrityError(f"Stream ended at offset {self.offset} before the final chunk")
+        return self
+
+    def getvalue(self) -> bytes:
+        return bytes(self._buffer)
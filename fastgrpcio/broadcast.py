@@ -0,0 +1,109 @@
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Literal
+
+import grpc
+
+from fastgrpcio.context import Context
+from fastgrpcio.schemas import BaseGRPCSchema
+
+logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S", level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SlowConsumerPolicy = Literal["drop_oldest", "disconnect", "block"]
+
+
+class Envelope:
+    __slots__ = ("event", "_encoded")
+
+    def __init__(self, event: BaseGRPCSchema) -> None:
+        self.event = event
+        self._encoded: dict[type[Any], bytes] = {}
+
+    def encode(self, message_class: type[Any]) -> bytes:
+        payload = self._encoded.get(message_class)
+        if payload is None:
+            payload = message_class(**self.event.model_dump()).SerializeToString()
+            self._encoded[message_class] = payload
+        return payload
+
+
+class Subscription:
+    __slots__ = ("queue", "policy", "dropped", "disconnected")
+
+    def __init__(self, maxsize: int, policy: SlowConsumerPolicy) -> None:
+        self.queue: asyncio.Queue[Envelope] = asyncio.Queue(maxsize=maxsize)
+        self.policy = policy
+        self.dropped = 0
+        self.disconnected = False
+
+    async def deliver(self, envelope: Envelope) -> bool:
+        try:
+            self.queue.put_nowait(envelope)
+            return True
+        except asyncio.QueueFull:
+            pass
+
+        if self.policy == "block":
+            await self.queue.put(envelope)
+            return True
+        if self.policy == "drop_oldest":
+            self.queue.get_nowait()
+            self.queue.put_nowait(envelope)
+            self.dropped += 1
+            return True
+
+        self.disconnected = True
+        return False
+
+
+class Broadcast:
+    def __init__(self, maxsize: int = 256, policy: SlowConsumerPolicy = "drop_oldest") -> None:
+        self.maxsize = maxsize
+        self.policy = policy
+        self._topics: dict[str, set[Subscription]] = {}
+
+    def subscriber_count(self, topic: str) -> int:
+        return len(self._topics.get(topic, ()))
+
+    async def publish(self, topic: str, event: BaseGRPCSchema) -> int:
+        subscriptions = self._topics.get(topic)
+        if not subscriptions:
+            return 0
+
+        envelope = Envelope(event)
+        delivered = 0
+        for subscription in list(subscriptions):
+            if await subscription.deliver(envelope):
+                delivered += 1
+            else:
+                self._unsubscribe(topic, subscription)
+        return delivered
+
+    def _unsubscribe(self, topic: str, subscription: Subscription) -> None:
+        subscriptions = self._topics.get(topic)
+        if subscriptions is None:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._topics[topic]
+
+    async def subscribe(
+        self,
+        topic: str,
+        context: Context,
+        maxsize: int | None = None,
+        policy: SlowConsumerPolicy | None = None,
+    ) -> AsyncIterator[Envelope]:
+        subscription = Subscription(maxsize or self.maxsize, policy or self.policy)
+        self._topics.setdefault(topic, set()).add(subscription)
+        try:
+            while not subscription.disconnected:
+                yield await subscription.queue.get()
+        finally:
+            self._unsubscribe(topic, subscription)
+            if subscription.dropped:
+                logger.warning("Subscriber of %s dropped %d events", topic, subscription.dropped)
+
+        logger.warning("Disconnected slow subscriber of %s", topic)
+        await context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, "Subscriber fell behind the broadcast")
@@ -1,22 +1,43 @@
 from __future__ import annotations
 
 import asyncio
+import time
 import grpc
-from typing import Any, AsyncIterator, Type, Callable
+from contextlib import asynccontextmanager
+from types import ModuleType
+from typing import Any, AsyncIterator, Sequence, Type, Callable, Literal, TypeAlias
 
 from google.protobuf import descriptor_pb2, descriptor_pool
 from google.protobuf.message_factory import GetMessageClass
 from google.protobuf.json_format import ParseDict, MessageToDict
+from google.protobuf.message import Message
 from grpc_reflection.v1alpha import reflection_pb2, reflection_pb2_grpc
 
+from fastgrpcio.calls.balancing import Endpoint, EndpointBalancer, Resolver
+from fastgrpcio.calls.breaker import Circuit, CircuitBreaker, is_circuit_failure
+from fastgrpcio.calls.cache import CacheKey, ResponseCache
+from fastgrpcio.calls.hashing import HashRing
+from fastgrpcio.calls.replay import ReplayBuffer
+from fastgrpcio.codec import message_to_dict
+from fastgrpcio.context import CACHE_CONTROL_METADATA_KEY, current_deadline, remaining_budget
+from fastgrpcio.exceptions import CircuitOpenError
+from fastgrpcio.field_masks import FIELD_MASK_METADATA_KEY
+from fastgrpcio.load_reporting import LOAD_REPORT_METADATA_KEY, parse_load_report
+from fastgrpcio.schemas import BaseGRPCSchema
+
 try:
     from opentelemetry import trace
     from opentelemetry.propagate import extract, inject
-    from opentelemetry.trace import INVALID_SPAN
+
+    from fastgrpcio.tracing.carrier import carrier_keys
+
     _OTEL_ENABLED = True
 except ImportError:
     _OTEL_ENABLED = False
 
+    def carrier_keys() -> frozenset[str]:
+        return frozenset()
+
     class DummyTracer:
         def start_as_current_span(self, name: str, context: Any = None):
             class DummySpan:
@@ -37,13 +58,23 @@ except ImportError:
     trace = DummyTrace()
     extract = DummyPropagate.extract
     inject = DummyPropagate.inject
-    INVALID_SPAN = object()
+
+
+ResponseFormat = Literal["dict", "proto", "model"]
+
+RequestBody: TypeAlias = dict[str, Any] | Message | BaseGRPCSchema | bytes
+
+
+def _serialize_request(message: Any) -> bytes:
+    if isinstance(message, bytes):
+        return message
+    return message.SerializeToString()
 
 
 class GRPCClient:
     def __init__(
         self,
-        target: str,
+        target: str | Sequence[str],
         use_tls: bool = False,
         *,
         max_retries: int = 3,
@@ -53,35 +84,137 @@ class GRPCClient:
             ConnectionError,
             TimeoutError,
         ),
+        proto_modules: Sequence[ModuleType] = (),
+        trace_stream_events: bool = False,
+        default_timeout: float | None = 10,
+        propagate_deadline: bool = True,
+        resolver: Resolver | None = None,
+        outlier_failure_threshold: int = 5,
+        outlier_ejection_time: float = 10.0,
+        probe_interval: float = 5.0,
+        hash_replicas: int = 160,
+        hash_load_factor: float = 1.25,
+        response_format: ResponseFormat = "dict",
+        cache: ResponseCache | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        replay_buffer_size: int = 1 << 20,
     ) -> None:
-        self.target = target
+        self.targets = [target] if isinstance(target, str) else list(target)
+        self.target = self.targets[0] if self.targets else ""
         self.use_tls = use_tls
-        self.channel: grpc.aio.Channel | None = None
+        self.resolver = resolver
         self.tracer = trace.get_tracer(__name__)
         self.max_retries = max_retries
         self.retry_backoff = retry_backoff
         self.retry_exceptions = retry_exceptions
+        self.proto_modules = tuple(proto_modules)
+        self.trace_stream_events = trace_stream_events
+        self.default_timeout = default_timeout
+        self.propagate_deadline = propagate_deadline
+        self.response_format = response_format
+        self.cache = cache
+        self.circuit_breaker = circuit_breaker
+        self.replay_buffer_size = replay_buffer_size
+        self.load_reports: dict[str, dict[str, float]] = {}
+        self._descriptors: dict[str, tuple[Any, descriptor_pool.DescriptorPool]] = {}
+        self._balancer = EndpointBalancer(
+            self._create_channel,
+            failure_threshold=outlier_failure_threshold,
+            base_ejection_time=outlier_ejection_time,
+            probe_interval=probe_interval,
+            hash_ring=HashRing(replicas=hash_replicas, load_factor=hash_load_factor),
+        )
+
+    def _create_channel(self, target: str) -> grpc.aio.Channel:
+        if self.use_tls:
+            return grpc.aio.secure_channel(target, grpc.ssl_channel_credentials())
+        return grpc.aio.insecure_channel(target)
+
+    @property
+    def channel(self) -> grpc.aio.Channel | None:
+        endpoints = self._balancer._endpoint_list
+        return endpoints[0].channel if endpoints else None
+
+    @property
+    def endpoints(self) -> list[Endpoint]:
+        return list(self._balancer._endpoint_list)
 
     async def __aenter__(self) -> GRPCClient:
-        creds = grpc.ssl_channel_credentials() if self.use_tls else None
-        self.channel = (
-            grpc.aio.secure_channel(self.target, creds)
-            if creds else grpc.aio.insecure_channel(self.target)
-        )
+        self._balancer.set_targets(self.targets)
+        if self.resolver is not None or len(self.targets) > 1:
+            await self._balancer.start(self.resolver)
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
-        if self.channel:
-            await self.channel.close()
-
-    async def _get_service_descriptor(
+        if self.cache is not None:
+            self.cache.cancel_pending()
+        await self._balancer.close()
+
+    def _admit(self, breaker: CircuitBreaker, endpoint: Endpoint, method: str) -> tuple[Endpoint, Circuit]:
+        circuit = breaker.get(endpoint.target, method)
+        if circuit.allow():
+            return endpoint, circuit
+        for candidate in self._balancer._endpoint_list:
+            if candidate is endpoint:
+                continue
+            candidate_circuit = breaker.get(candidate.target, method)
+            if candidate_circuit.allow():
+                return candidate, candidate_circuit
+        raise CircuitOpenError(endpoint.target, method, circuit.retry_after())
+
+    @asynccontextmanager
+    async def _endpoint(
+        self,
+        hash_key: str | None = None,
+        method: str | None = None,
+        measure_latency: bool = False,
+        timeout: float | None = None,
+    ) -> AsyncIterator[Endpoint]:
+        endpoint = self._balancer.pick(hash_key)
+        breaker = self.circuit_breaker if method is not None else None
+        circuit: Circuit | None = None
+        if breaker is not None and method is not None:
+            endpoint, circuit = self._admit(breaker, endpoint, method)
+
+        started = time.monotonic()
+        endpoint.outstanding += 1
+        try:
+            yield endpoint
+        except Exception as exc:
+            if self._hit_caller_deadline(exc, timeout, started):
+                # The caller's own budget ran out; that says nothing about this endpoint's health.
+                if circuit is not None:
+                    circuit.release()
+                raise
+            self._balancer.record_failure(endpoint, exc)
+            if circuit is not None:
+                circuit.record(failed=is_circuit_failure(exc))
+            raise
+        except BaseException:
+            if circuit is not None:
+                circuit.release()
+            raise
+        else:
+            self._balancer.record_success(endpoint)
+            if breaker is not None and circuit is not None:
+                slow = measure_latency and breaker.is_slow(time.monotonic() - started)
+                circuit.record(failed=False, slow=slow)
+        finally:
+            endpoint.outstanding -= 1
+
+    def _find_static_service(self, service_name: str) -> Any | None:
+        for module in self.proto_modules:
+            for service_desc in module.DESCRIPTOR.services_by_name.values():
+                if service_desc.full_name == service_name:
+                    return service_desc
+        return None
+
+    async def _reflect_service(
         self,
         service_name: str,
+        channel: grpc.aio.Channel,
     ) -> tuple[Any, descriptor_pool.DescriptorPool]:
-        if not self.channel:
-            raise RuntimeError("Channel is not initialized")
-
-        stub = reflection_pb2_grpc.ServerReflectionStub(self.channel)
+        stub = reflection_pb2_grpc.ServerReflectionStub(channel)
 
         list_req = reflection_pb2.ServerReflectionRequest(list_services="")
         call = stub.ServerReflectionInfo()
@@ -108,6 +241,29 @@ class GRPCClient:
 
         return service_desc, pool
 
+    async def _get_service_descriptor(
+        self,
+        service_name: str,
+    ) -> tuple[Any, descriptor_pool.DescriptorPool]:
+        if not self.channel:
+            raise RuntimeError("Channel is not initialized")
+
+        static_service_desc = self._find_static_service(service_name)
+        if static_service_desc is not None:
+            return static_service_desc, descriptor_pool.Default()
+
+        cached = self._descriptors.get(service_name)
+        if cached is not None:
+            return cached
+
+        async def fetch() -> tuple[Any, descriptor_pool.DescriptorPool]:
+            async with self._endpoint() as endpoint:
+                return await self._reflect_service(service_name, endpoint.channel)
+
+        service_desc, pool = await self._retry_call(fetch)
+        self._descriptors[service_name] = (service_desc, pool)
+        return service_desc, pool
+
     def _create_messages(
         self,
         pool: descriptor_pool.DescriptorPool,
@@ -117,39 +273,119 @@ class GRPCClient:
         response_cls = GetMessageClass(pool.FindMessageTypeByName(method_desc.output_type.full_name))
         return request_cls, response_cls
 
-    async def _prepare_tracing_context(
+    @staticmethod
+    def _encode_request(request_cls: type[Message], body: RequestBody) -> Any:
+        if isinstance(body, (bytes, Message)):
+            return body
+        if isinstance(body, BaseGRPCSchema):
+            return request_cls(**body.model_dump())
+        request_msg = request_cls()
+        ParseDict(body, request_msg)
+        return request_msg
+
+    def _response_decoder(
+        self,
+        response_model: type[BaseGRPCSchema] | None,
+        response_format: ResponseFormat | None,
+    ) -> Callable[[Message], Any]:
+        if response_model is not None:
+            return lambda response: response_model.model_validate(message_to_dict(response))
+        response_format = response_format or self.response_format
+        if response_format == "proto":
+            return lambda response: response
+        if response_format == "model":
+            raise ValueError("response_format='model' requires response_model")
+        return lambda response: MessageToDict(response, preserving_proto_field_name=True)
+
+    @staticmethod
+    def _with_field_mask(
+        metadata: list[tuple[str, str]] | None,
+        fields: Sequence[str] | None,
+    ) -> list[tuple[str, str]] | None:
+        if not fields:
+            return metadata
+        return [*(metadata or ()), (FIELD_MASK_METADATA_KEY, ",".join(fields))]
+
+    def _prepare_tracing_context(
         self,
         metadata: dict[str, str] | None = None,
     ) -> tuple[dict[str, str], Any]:
-        if not _OTEL_ENABLED:
-            return dict(metadata or []), None
-
-        ctx = extract(dict(metadata or []))
-        current_span = trace.get_current_span(context=ctx)
-        try:
-            invalid_ctx = INVALID_SPAN.get_span_context()
-        except AttributeError:
-            invalid_ctx = None
-
-        if hasattr(current_span, "get_span_context") and current_span.get_span_context() == invalid_ctx:
-            metadata_dict: dict[str, str] = {}
-            with self.tracer.start_as_current_span("RootTrace") as span:
-                ctx = trace.set_span_in_context(span)
-                inject(metadata_dict, context=ctx)
-            return metadata_dict, ctx
-
         metadata_dict = dict(metadata or [])
-        inject(metadata_dict, context=ctx)
-        return metadata_dict, ctx
-
-    async def _retry_call(self, func: Callable[[], Any]) -> Any:
+        if not _OTEL_ENABLED or carrier_keys().isdisjoint(metadata_dict):
+            return metadata_dict, None
+        return metadata_dict, extract(metadata_dict)
+
+    @staticmethod
+    def _inject_span(metadata_dict: dict[str, str], span: Any) -> dict[str, str]:
+        if not _OTEL_ENABLED or span is None or not span.is_recording():
+            return metadata_dict
+        call_metadata = dict(metadata_dict)
+        inject(call_metadata, context=trace.set_span_in_context(span))
+        return call_metadata
+
+    def _add_message_event(self, span: Any, message_type: str, message_id: int) -> None:
+        if self.trace_stream_events and span is not None and span.is_recording():
+            span.add_event("message", {"message.type": message_type, "message.id": message_id})
+
+    async def _record_load_report(self, call: Any, endpoint: Endpoint) -> None:
+        for key, value in await call.trailing_metadata() or ():
+            if key == LOAD_REPORT_METADATA_KEY:
+                endpoint.load = parse_load_report(value)
+                self.load_reports[endpoint.target] = endpoint.load
+                return
+
+    async def _store_cached(self, key: CacheKey, call: Any, response: Message) -> None:
+        if self.cache is None:
+            return
+        cache_control = None
+        for metadata_key, value in await call.trailing_metadata() or ():
+            if metadata_key == CACHE_CONTROL_METADATA_KEY:
+                cache_control = value
+                break
+        max_age, stale_while_revalidate = self.cache.lifetime(key[0], cache_control)
+        self.cache.store(key, response.SerializeToString(), max_age, stale_while_revalidate)
+
+    def _resolve_timeout(self, timeout: float | None) -> float | None:
+        if timeout is None:
+            timeout = self.default_timeout
+        if not self.propagate_deadline:
+            return timeout
+
+        budget = remaining_budget()
+        if budget is None:
+            return timeout
+        budget = max(budget, 0.0)
+        return budget if timeout is None else min(timeout, budget)
+
+    def _hit_caller_deadline(self, exc: Exception, timeout: float | None, started: float) -> bool:
+        if not isinstance(exc, grpc.aio.AioRpcError) or exc.code() != grpc.StatusCode.DEADLINE_EXCEEDED:
+            return False
+        if not self.propagate_deadline:
+            return False
+        deadline = current_deadline()
+        if deadline is None:
+            return False
+        if timeout is None:
+            timeout = self.default_timeout
+        # Only a deadline the propagated budget cut shorter than the call's own timeout counts as the caller's.
+        return timeout is None or deadline < started + timeout
+
+    def _budget_exhausted(self) -> bool:
+        if not self.propagate_deadline:
+            return False
+        budget = remaining_budget()
+        return budget is not None and budget <= 0
+
+    async def _retry_call(self, func: Callable[[], Any], replay: ReplayBuffer | None = None) -> Any:
         last_exc: Exception | None = None
         for attempt in range(1, self.max_retries + 1):
             try:
                 return await func()
             except self.retry_exceptions as exc:
                 last_exc = exc
-                if attempt == self.max_retries:
+                if attempt == self.max_retries or self._budget_exhausted():
+                    raise
+                if replay is not None and replay.overflowed:
                     raise
                 delay = self.retry_backoff * (2 ** (attempt - 1))
                 await asyncio.sleep(delay)
@@ -161,75 +397,130 @@ class GRPCClient:
         self,
         service_name: str,
         method_name: str,
-        body: dict[str, Any],
+        body: RequestBody,
         *,
         metadata: list[tuple[str, str]] | None = None,
-        timeout: float | None = 10,
-    ) -> dict[str, Any]:
+        timeout: float | None = None,
+        hash_key: str | None = None,
+        response_model: type[BaseGRPCSchema] | None = None,
+        response_format: ResponseFormat | None = None,
+        fields: Sequence[str] | None = None,
+        use_cache: bool = True,
+    ) -> Any:
         if not self.channel:
             raise RuntimeError("Channel is not initialized")
 
         service_desc, pool = await self._get_service_descriptor(service_name)
         method_desc = service_desc.FindMethodByName(method_name)
         request_cls, response_cls = self._create_messages(pool, method_desc)
-        request_msg = request_cls()
-        ParseDict(body, request_msg)
+        request_msg = self._encode_request(request_cls, body)
+        decode = self._response_decoder(response_model, response_format)
 
-        metadata_dict, ctx = await self._prepare_tracing_context(metadata)
+        metadata_dict, ctx = self._prepare_tracing_context(self._with_field_mask(metadata, fields))
         method_path = f"/{service_name}/{method_name}"
 
-        call = self.channel.unary_unary(
-            method_path,
-            request_serializer=request_msg.SerializeToString,
-            response_deserializer=response_cls.FromString,
-        )
-
-        async def do_call() -> dict[str, Any]:
-            with self.tracer.start_as_current_span(f"grpc.unary_unary.{method_name}", context=ctx):
-                response = await call(request_msg, metadata=metadata_dict.items(), timeout=timeout)
-                return MessageToDict(response, preserving_proto_field_name=True)
-
-        return await self._retry_call(do_call)
+        cache_key: CacheKey | None = None
+        if self.cache is not None and use_cache:
+            request_bytes = _serialize_request(request_msg)
+            cache_key = self.cache.make_key(method_path, request_bytes, metadata_dict, carrier_keys())
+
+        async def do_call() -> Any:
+            async with self._endpoint(hash_key, method_path, measure_latency=True, timeout=timeout) as endpoint:
+                call = endpoint.channel.unary_unary(
+                    method_path,
+                    request_serializer=_serialize_request,
+                    response_deserializer=response_cls.FromString,
+                )
+                with self.tracer.start_as_current_span(f"grpc.unary_unary.{method_name}", context=ctx) as span:
+                    call_metadata = self._inject_span(metadata_dict, span)
+                    call_timeout = self._resolve_timeout(timeout)
+                    rpc = call(request_msg, metadata=call_metadata.items(), timeout=call_timeout)
+                    response = await rpc
+                    await self._record_load_report(rpc, endpoint)
+                    if cache_key is not None:
+                        await self._store_cached(cache_key, rpc, response)
+                    return response
+
+        if cache_key is not None and self.cache is not None:
+            payload, stale = self.cache.lookup(cache_key)
+            if payload is not None:
+                if stale:
+                    self.cache.revalidate(cache_key, lambda: self._retry_call(do_call))
+                return decode(response_cls.FromString(payload))
+
+        return decode(await self._retry_call(do_call))
 
     async def unary_stream(
         self,
         service_name: str,
         method_name: str,
-        body: dict[str, Any],
+        body: RequestBody,
         *,
         metadata: list[tuple[str, str]] | None = None,
-        timeout: float | None = 10,
-    ) -> AsyncIterator[dict[str, Any]]:
+        timeout: float | None = None,
+        hash_key: str | None = None,
+        response_model: type[BaseGRPCSchema] | None = None,
+        response_format: ResponseFormat | None = None,
+        fields: Sequence[str] | None = None,
+        resume_field: str | tuple[str, str] | None = None,
+    ) -> AsyncIterator[Any]:
         if not self.channel:
             raise RuntimeError("Channel is not initialized")
 
         service_desc, pool = await self._get_service_descriptor(service_name)
         method_desc = service_desc.FindMethodByName(method_name)
         request_cls, response_cls = self._create_messages(pool, method_desc)
-        request_msg = request_cls()
-        ParseDict(body, request_msg)
+        request_msg = self._encode_request(request_cls, body)
+        decode = self._response_decoder(response_model, response_format)
 
-        metadata_dict, ctx = await self._prepare_tracing_context(metadata)
-        method_path = f"/{service_name}/{method_name}"
+        if isinstance(resume_field, str):
+            resume_field = (resume_field, resume_field)
+        if resume_field is not None and isinstance(request_msg, bytes):
+            request_msg = request_cls.FromString(request_msg)
+        resume_from: Any = None
 
-        call = self.channel.unary_stream(
-            method_path,
-            request_serializer=request_msg.SerializeToString,
-            response_deserializer=response_cls.FromString,
-        )
-
-        async def stream_call() -> AsyncIterator[dict[str, Any]]:
-            with self.tracer.start_as_current_span(f"grpc.unary_stream.{method_name}", context=ctx):
-                async for response in call(request_msg, metadata=metadata_dict.items(), timeout=timeout):
-                    yield MessageToDict(response, preserving_proto_field_name=True)
+        metadata_dict, ctx = self._prepare_tracing_context(self._with_field_mask(metadata, fields))
+        method_path = f"/{service_name}/{method_name}"
 
+        async def stream_call() -> AsyncIterator[Any]:
+            nonlocal resume_from
+            attempt_msg = request_msg
+            if resume_field is not None and resume_from is not None:
+                # Ask the server to continue after the last message received, so a retry
+                # doesn't re-read the part of the stream the caller already has.
+                attempt_msg = request_cls()
+                attempt_msg.CopyFrom(request_msg)
+                setattr(attempt_msg, resume_field[1], resume_from)
+            async with self._endpoint(hash_key, method_path, timeout=timeout) as endpoint:
+                call = endpoint.channel.unary_stream(
+                    method_path,
+                    request_serializer=_serialize_request,
+                    response_deserializer=response_cls.FromString,
+                )
+                with self.tracer.start_as_current_span(f"grpc.unary_stream.{method_name}", context=ctx) as span:
+                    call_metadata = self._inject_span(metadata_dict, span)
+                    call_timeout = self._resolve_timeout(timeout)
+                    message_id = 0
+                    async for response in call(attempt_msg, metadata=call_metadata.items(), timeout=call_timeout):
+                        message_id += 1
+                        self._add_message_event(span, "RECEIVED", message_id)
+                        if resume_field is not None:
+                            resume_from = getattr(response, resume_field[0])
+                        yield decode(response)
+
+        delivered = False
         for attempt in range(1, self.max_retries + 1):
             try:
                 async for item in stream_call():
+                    delivered = True
                     yield item
                 break
-            except self.retry_exceptions as exc:
-                if attempt == self.max_retries:
+            except self.retry_exceptions:
+                if attempt == self.max_retries or self._budget_exhausted():
+                    raise
+                # Without a resume field a retry starts the stream over, so once the caller has
+                # messages it would get them a second time.
+                if delivered and resume_field is None:
                     raise
                 await asyncio.sleep(self.retry_backoff * (2 ** (attempt - 1)))
 
@@ -237,78 +528,121 @@ class GRPCClient:
         self,
         service_name: str,
         method_name: str,
-        body_stream: AsyncIterator[dict[str, Any]],
+        body_stream: AsyncIterator[RequestBody],
         *,
         metadata: list[tuple[str, str]] | None = None,
-        timeout: float | None = 10,
-    ) -> dict[str, Any]:
+        timeout: float | None = None,
+        hash_key: str | None = None,
+        response_model: type[BaseGRPCSchema] | None = None,
+        response_format: ResponseFormat | None = None,
+        fields: Sequence[str] | None = None,
+    ) -> Any:
         if not self.channel:
             raise RuntimeError("Channel is not initialized")
 
         service_desc, pool = await self._get_service_descriptor(service_name)
         method_desc = service_desc.FindMethodByName(method_name)
         request_cls, response_cls = self._create_messages(pool, method_desc)
+        decode = self._response_decoder(response_model, response_format)
 
-        async def req_iter() -> AsyncIterator[Any]:
-            async for item in body_stream:
-                msg = request_cls()
-                ParseDict(item, msg)
+        replay = ReplayBuffer(
+            body_stream, self.replay_buffer_size, lambda item: self._encode_request(request_cls, item)
+        )
+
+        async def req_iter(span: Any = None) -> AsyncIterator[Any]:
+            message_id = 0
+            async for msg in replay.replay():
+                message_id += 1
+                self._add_message_event(span, "SENT", message_id)
                 yield msg
 
-        metadata_dict, ctx = await self._prepare_tracing_context(metadata)
+        metadata_dict, ctx = self._prepare_tracing_context(self._with_field_mask(metadata, fields))
         method_path = f"/{service_name}/{method_name}"
 
-        call = self.channel.stream_unary(
-            method_path,
-            request_serializer=lambda m: m.SerializeToString(),
-            response_deserializer=response_cls.FromString,
-        )
+        async def do_call() -> Any:
+            async with self._endpoint(hash_key, method_path, measure_latency=True, timeout=timeout) as endpoint:
+                call = endpoint.channel.stream_unary(
+                    method_path,
+                    request_serializer=_serialize_request,
+                    response_deserializer=response_cls.FromString,
+                )
+                with self.tracer.start_as_current_span(f"grpc.stream_unary.{method_name}", context=ctx) as span:
+                    call_metadata = self._inject_span(metadata_dict, span)
+                    call_timeout = self._resolve_timeout(timeout)
+                    rpc = call(req_iter(span), metadata=call_metadata.items(), timeout=call_timeout)
+                    response = await rpc
+                    await self._record_load_report(rpc, endpoint)
+                    return decode(response)
 
-        async def do_call() -> dict[str, Any]:
-            with self.tracer.start_as_current_span(f"grpc.stream_unary.{method_name}", context=ctx):
-                response = await call(req_iter(), metadata=metadata_dict.items(), timeout=timeout)
-                return MessageToDict(response, preserving_proto_field_name=True)
-
-        return await self._retry_call(do_call)
+        try:
+            return await self._retry_call(do_call, replay)
+        finally:
+            await replay.close()
 
     async def stream_stream(
         self,
         service_name: str,
         method_name: str,
-        body_stream: AsyncIterator[dict[str, Any]],
+        body_stream: AsyncIterator[RequestBody],
         *,
         metadata: list[tuple[str, str]] | None = None,
-        timeout: float | None = 10,
-    ) -> AsyncIterator[dict[str, Any]]:
+        timeout: float | None = None,
+        hash_key: str | None = None,
+        response_model: type[BaseGRPCSchema] | None = None,
+        response_format: ResponseFormat | None = None,
+        fields: Sequence[str] | None = None,
+    ) -> AsyncIterator[Any]:
         if not self.channel:
             raise RuntimeError("Channel is not initialized")
 
         service_desc, pool = await self._get_service_descriptor(service_name)
         method_desc = service_desc.FindMethodByName(method_name)
         request_cls, response_cls = self._create_messages(pool, method_desc)
+        decode = self._response_decoder(response_model, response_format)
+
+        replay = ReplayBuffer(
+            body_stream, self.replay_buffer_size, lambda item: self._encode_request(request_cls, item)
+        )
 
-        async def req_iter() -> AsyncIterator[Any]:
-            async for item in body_stream:
-                msg = request_cls()
-                ParseDict(item, msg)
+        async def req_iter(span: Any = None) -> AsyncIterator[Any]:
+            message_id = 0
+            async for msg in replay.replay():
+                message_id += 1
+                self._add_message_event(span, "SENT", message_id)
                 yield msg
 
-        metadata_dict, ctx = await self._prepare_tracing_context(metadata)
+        metadata_dict, ctx = self._prepare_tracing_context(self._with_field_mask(metadata, fields))
         method_path = f"/{service_name}/{method_name}"
 
-        call = self.channel.stream_stream(
-            method_path,
-            request_serializer=lambda m: m.SerializeToString(),
-            response_deserializer=response_cls.FromString,
-        )
-
-        for attempt in range(1, self.max_retries + 1):
-            try:
-                with self.tracer.start_as_current_span(f"grpc.stream_stream.{method_name}", context=ctx):
-                    async for response in call(req_iter(), metadata=metadata_dict.items(), timeout=timeout):
-                        yield MessageToDict(response, preserving_proto_field_name=True)
-                break
-            except self.retry_exceptions:
-                if attempt == self.max_retries:
-                    raise
-                await asyncio.sleep(self.retry_backoff * (2 ** (attempt - 1)))
+        async def stream_call() -> AsyncIterator[Any]:
+            async with self._endpoint(hash_key, method_path, timeout=timeout) as endpoint:
+                call = endpoint.channel.stream_stream(
+                    method_path,
+                    request_serializer=_serialize_request,
+                    response_deserializer=response_cls.FromString,
+                )
+                with self.tracer.start_as_current_span(f"grpc.stream_stream.{method_name}", context=ctx) as span:
+                    call_metadata = self._inject_span(metadata_dict, span)
+                    call_timeout = self._resolve_timeout(timeout)
+                    message_id = 0
+                    async for response in call(req_iter(span), metadata=call_metadata.items(), timeout=call_timeout):
+                        message_id += 1
+                        self._add_message_event(span, "RECEIVED", message_id)
+                        yield decode(response)
+
+        delivered = False
+        try:
+            for attempt in range(1, self.max_retries + 1):
+                try:
+                    async for item in stream_call():
+                        delivered = True
+                        yield item
+                    break
+                except self.retry_exceptions:
+                    # A retry sends the whole request stream again, so it is only safe before any
+                    # response has reached the caller.
+                    if attempt == self.max_retries or self._budget_exhausted() or replay.overflowed or delivered:
+                        raise
+                    await asyncio.sleep(self.retry_backoff * (2 ** (attempt - 1)))
+        finally:
+            await replay.close()
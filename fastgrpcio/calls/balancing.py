@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Sequence
+
+import grpc
+
+from fastgrpcio.calls.hashing import HashRing
+
+logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S", level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+Resolver = Callable[[], Awaitable[Sequence[str]] | Sequence[str]]
+
+OUTLIER_STATUS_CODES = frozenset(
+    {
+        grpc.StatusCode.UNAVAILABLE,
+        grpc.StatusCode.UNKNOWN,
+        grpc.StatusCode.INTERNAL,
+        grpc.StatusCode.DEADLINE_EXCEEDED,
+    }
+)
+
+
+class Endpoint:
+    __slots__ = ("target", "channel", "outstanding", "consecutive_failures", "ejected_until", "ejection_count", "load")
+
+    def __init__(self, target: str, channel: grpc.aio.Channel) -> None:
+        self.target = target
+        self.channel = channel
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.ejection_count = 0
+        self.load: dict[str, float] = {}
+
+    def is_ejected(self, now: float) -> bool:
+        return self.ejected_until > now
+
+    def score(self) -> float:
+        return (self.outstanding + 1) * (1.0 + self.load.get("cpu_utilization", 0.0))
+
+
+class EndpointBalancer:
+    def __init__(
+        self,
+        channel_factory: Callable[[str], grpc.aio.Channel],
+        *,
+        failure_threshold: int = 5,
+        base_ejection_time: float = 10.0,
+        max_ejection_time: float = 300.0,
+        max_ejection_percent: float = 0.5,
+        probe_interval: float = 5.0,
+        probe_timeout: float = 1.0,
+        hash_ring: HashRing | None = None,
+    ) -> None:
+        self.channel_factory = channel_factory
+        self.failure_threshold = failure_threshold
+        self.base_ejection_time = base_ejection_time
+        self.max_ejection_time = max_ejection_time
+        self.max_ejection_percent = max_ejection_percent
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.hash_ring = hash_ring or HashRing()
+        self.endpoints: dict[str, Endpoint] = {}
+        self._endpoint_list: list[Endpoint] = []
+        self._probe_task: asyncio.Task[None] | None = None
+
+    def set_targets(self, targets: Sequence[str]) -> None:
+        wanted = dict.fromkeys(targets)
+        for target in list(self.endpoints):
+            if target not in wanted:
+                endpoint = self.endpoints.pop(target)
+                asyncio.ensure_future(endpoint.channel.close(grace=self.probe_timeout))
+                logger.info("Removed endpoint %s", target)
+        for target in wanted:
+            if target not in self.endpoints:
+                self.endpoints[target] = Endpoint(target, self.channel_factory(target))
+        self._endpoint_list = list(self.endpoints.values())
+        self.hash_ring.rebuild(list(self.endpoints))
+
+    def pick(self, hash_key: str | None = None) -> Endpoint:
+        endpoints = self._endpoint_list
+        if not endpoints:
+            raise RuntimeError("No endpoints available")
+        if len(endpoints) == 1:
+            return endpoints[0]
+        if hash_key is not None:
+            return self.hash_ring.lookup(hash_key, self.endpoints)
+
+        now = time.monotonic()
+        candidates = [endpoint for endpoint in endpoints if not endpoint.is_ejected(now)] or endpoints
+        if len(candidates) == 1:
+            return candidates[0]
+
+        first, second = random.sample(candidates, 2)
+        return first if first.score() <= second.score() else second
+
+    def _ejected_count(self, now: float) -> int:
+        return sum(1 for endpoint in self._endpoint_list if endpoint.is_ejected(now))
+
+    def record_success(self, endpoint: Endpoint) -> None:
+        endpoint.consecutive_failures = 0
+
+    def record_failure(self, endpoint: Endpoint, exc: BaseException) -> None:
+        if isinstance(exc, grpc.aio.AioRpcError) and exc.code() not in OUTLIER_STATUS_CODES:
+            endpoint.consecutive_failures = 0
+            return
+        if not isinstance(exc, (grpc.aio.AioRpcError, ConnectionError, TimeoutError)):
+            return
+
+        endpoint.consecutive_failures += 1
+        if endpoint.consecutive_failures < self.failure_threshold:
+            return
+
+        now = time.monotonic()
+        if endpoint.is_ejected(now):
+            return
+        if self._ejected_count(now) + 1 > len(self._endpoint_list) * self.max_ejection_percent:
+            return
+
+        endpoint.ejection_count += 1
+        ejection_time = min(self.base_ejection_time * endpoint.ejection_count, self.max_ejection_time)
+        endpoint.ejected_until = now + ejection_time
+        logger.warning(
+            "Ejected endpoint %s for %.1fs after %d consecutive failures",
+            endpoint.target,
+            ejection_time,
+            endpoint.consecutive_failures,
+        )
+
+    async def _probe(self, endpoint: Endpoint) -> None:
+        try:
+            await asyncio.wait_for(endpoint.channel.channel_ready(), self.probe_timeout)
+        except (asyncio.TimeoutError, grpc.aio.AioRpcError):
+            endpoint.ejected_until = time.monotonic() + self.probe_interval
+            return
+
+        endpoint.ejected_until = 0.0
+        endpoint.consecutive_failures = 0
+        logger.info("Endpoint %s passed probe and is back in rotation", endpoint.target)
+
+    async def _refresh(self, resolver: Resolver | None) -> None:
+        if resolver is None:
+            return
+        try:
+            targets = resolver()
+            if inspect.isawaitable(targets):
+                targets = await targets
+        except Exception:
+            logger.exception("Endpoint resolver failed, keeping %d endpoints", len(self._endpoint_list))
+            return
+        if targets:
+            self.set_targets(targets)
+
+    async def _run(self, resolver: Resolver | None) -> None:
+        while True:
+            await asyncio.sleep(self.probe_interval)
+            await self._refresh(resolver)
+            now = time.monotonic()
+            due = [
+                endpoint
+                for endpoint in self._endpoint_list
+                if endpoint.ejected_until and endpoint.ejected_until <= now + self.probe_interval
+            ]
+            if due:
+                await asyncio.gather(*(self._probe(endpoint) for endpoint in due))
+
+    async def start(self, resolver: Resolver | None = None) -> None:
+        await self._refresh(resolver)
+        if self._probe_task is None:
+            self._probe_task = asyncio.create_task(self._run(resolver))
+
+    async def close(self) -> None:
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            self._probe_task = None
+        await asyncio.gather(*(endpoint.channel.close() for endpoint in self._endpoint_list))
+        self.endpoints.clear()
+        self._endpoint_list = []
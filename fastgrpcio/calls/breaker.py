@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import logging
+import time
+from collections import deque
+from typing import Callable, Literal
+
+import grpc
+
+from fastgrpcio.calls.balancing import OUTLIER_STATUS_CODES
+
+logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S", level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CircuitState = Literal["closed", "open", "half_open"]
+
+StateChangeCallback = Callable[[str, str, CircuitState, CircuitState], None]
+
+
+def is_circuit_failure(exc: BaseException) -> bool:
+    if isinstance(exc, grpc.aio.AioRpcError):
+        return exc.code() in OUTLIER_STATUS_CODES
+    return isinstance(exc, (ConnectionError, TimeoutError))
+
+
+class Circuit:
+    __slots__ = (
+        "breaker",
+        "target",
+        "method",
+        "state",
+        "opened_at",
+        "_outcomes",
+        "_failures",
+        "_slow",
+        "_permits",
+        "_successes",
+    )
+
+    def __init__(self, breaker: CircuitBreaker, target: str, method: str) -> None:
+        self.breaker = breaker
+        self.target = target
+        self.method = method
+        self.state: CircuitState = "closed"
+        self.opened_at = 0.0
+        self._outcomes: deque[tuple[bool, bool]] = deque()
+        self._failures = 0
+        self._slow = 0
+        self._permits = 0
+        self._successes = 0
+
+    def retry_after(self) -> float:
+        if self.state != "open":
+            return 0.0
+        return max(self.opened_at + self.breaker.open_duration - time.monotonic(), 0.0)
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            if self.retry_after() > 0:
+                return False
+            self._transition("half_open")
+            self._permits = self.breaker.half_open_calls
+            self._successes = 0
+        if self._permits > 0:
+            self._permits -= 1
+            return True
+        return False
+
+    def release(self) -> None:
+        if self.state == "half_open":
+            self._permits += 1
+
+    def record(self, failed: bool, slow: bool = False) -> None:
+        if self.state == "open":
+            return
+        if self.state == "half_open":
+            if failed or slow:
+                self._transition("open")
+                return
+            self._successes += 1
+            if self._successes >= self.breaker.half_open_calls:
+                self._transition("closed")
+            return
+
+        if len(self._outcomes) >= self.breaker.window_size:
+            old_failed, old_slow = self._outcomes.popleft()
+            self._failures -= old_failed
+            self._slow -= old_slow
+        self._outcomes.append((failed, slow))
+        self._failures += failed
+        self._slow += slow
+
+        calls = len(self._outcomes)
+        if calls < self.breaker.minimum_calls:
+            return
+        if self._failures / calls >= self.breaker.failure_rate_threshold:
+            self._transition("open")
+        elif (
+            self.breaker.slow_call_threshold is not None and self._slow / calls >= self.breaker.slow_call_rate_threshold
+        ):
+            self._transition("open")
+
+    def _transition(self, state: CircuitState) -> None:
+        previous = self.state
+        self.state = state
+        if state == "open":
+            self.opened_at = time.monotonic()
+            logger.warning("Circuit for %s on %s opened", self.method, self.target)
+        elif state == "closed":
+            self._outcomes.clear()
+            self._failures = 0
+            self._slow = 0
+            logger.info("Circuit for %s on %s closed", self.method, self.target)
+        if self.breaker.on_state_change is not None:
+            self.breaker.on_state_change(self.target, self.method, previous, state)
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        *,
+        failure_rate_threshold: float = 0.5,
+        slow_call_threshold: float | None = None,
+        slow_call_rate_threshold: float = 0.5,
+        window_size: int = 20,
+        minimum_calls: int = 10,
+        open_duration: float = 30.0,
+        half_open_calls: int = 3,
+        on_state_change: StateChangeCallback | None = None,
+    ) -> None:
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_threshold = slow_call_threshold
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.window_size = window_size
+        self.minimum_calls = min(minimum_calls, window_size)
+        self.open_duration = open_duration
+        self.half_open_calls = half_open_calls
+        self.on_state_change = on_state_change
+        self._circuits: dict[tuple[str, str], Circuit] = {}
+
+    def get(self, target: str, method: str) -> Circuit:
+        key = (target, method)
+        circuit = self._circuits.get(key)
+        if circuit is None:
+            circuit = self._circuits[key] = Circuit(self, target, method)
+        return circuit
+
+    def is_slow(self, duration: float) -> bool:
+        return self.slow_call_threshold is not None and duration >= self.slow_call_threshold
+
+    def states(self) -> dict[tuple[str, str], CircuitState]:
+        return {key: circuit.state for key, circuit in self._circuits.items()}
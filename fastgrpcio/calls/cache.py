@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Collection, Mapping, NamedTuple
+
+from fastgrpcio.field_masks import FIELD_MASK_METADATA_KEY
+
+logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S", level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CacheKey = tuple[str, bytes, tuple[tuple[str, str | bytes], ...]]
+
+
+class CacheControl(NamedTuple):
+    max_age: float | None
+    stale_while_revalidate: float | None
+    private: bool = False
+
+
+def parse_cache_control(value: str) -> CacheControl:
+    max_age: float | None = None
+    stale_while_revalidate: float | None = None
+    private = False
+    for directive in value.split(","):
+        name, _, raw = directive.strip().partition("=")
+        name = name.lower()
+        if name in ("no-store", "no-cache"):
+            return CacheControl(0.0, 0.0)
+        if name == "private":
+            private = True
+            continue
+        try:
+            if name == "max-age":
+                max_age = float(raw)
+            elif name == "stale-while-revalidate":
+                stale_while_revalidate = float(raw)
+        except ValueError:
+            continue
+    return CacheControl(max_age, stale_while_revalidate, private)
+
+
+class CacheEntry:
+    __slots__ = ("payload", "fresh_until", "stale_until")
+
+    def __init__(self, payload: bytes, fresh_until: float, stale_until: float) -> None:
+        self.payload = payload
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float | None = None,
+        method_ttls: Mapping[str, float] | None = None,
+        stale_while_revalidate: float = 0.0,
+        vary: Collection[str] | None = None,
+        shared: bool = True,
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.method_ttls = {method.lstrip("/"): value for method, value in (method_ttls or {}).items()}
+        self.stale_while_revalidate = stale_while_revalidate
+        self.vary: tuple[str, ...] | None = None
+        if vary is not None:
+            self.vary = tuple(sorted({*(key.lower() for key in vary), FIELD_MASK_METADATA_KEY}))
+        self.shared = shared
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[CacheKey, CacheEntry] = OrderedDict()
+        self._refreshing: dict[CacheKey, asyncio.Task[Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def make_key(
+        self,
+        method_path: str,
+        request: bytes,
+        metadata: Mapping[str, str | bytes],
+        ignore: Collection[str] = (),
+    ) -> CacheKey:
+        # Metadata such as authorization or tenant headers can change the response, so it is part
+        # of the key unless the cache was told which keys matter.
+        if self.vary is None:
+            varying = tuple(sorted((key, value) for key, value in metadata.items() if key not in ignore))
+        else:
+            varying = tuple((key, metadata[key]) for key in self.vary if key in metadata)
+        return method_path, request, varying
+
+    def lookup(self, key: CacheKey) -> tuple[bytes | None, bool]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None, False
+
+        now = time.monotonic()
+        if now < entry.fresh_until:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.payload, False
+        if now < entry.stale_until:
+            self._entries.move_to_end(key)
+            self.stale_hits += 1
+            return entry.payload, True
+
+        del self._entries[key]
+        self.misses += 1
+        return None, False
+
+    def lifetime(self, method_path: str, cache_control: str | None) -> tuple[float, float]:
+        max_age: float | None = None
+        stale_while_revalidate: float | None = None
+        if cache_control is not None:
+            max_age, stale_while_revalidate, private = parse_cache_control(cache_control)
+            if private and self.shared:
+                return 0.0, 0.0
+        if max_age is None:
+            max_age = self.method_ttls.get(method_path.lstrip("/"), self.ttl)
+        if stale_while_revalidate is None:
+            stale_while_revalidate = self.stale_while_revalidate
+        return max_age or 0.0, stale_while_revalidate
+
+    def store(self, key: CacheKey, payload: bytes, max_age: float, stale_while_revalidate: float = 0.0) -> None:
+        if max_age <= 0:
+            self._entries.pop(key, None)
+            return
+
+        now = time.monotonic()
+        self._entries[key] = CacheEntry(payload, now + max_age, now + max_age + stale_while_revalidate)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def revalidate(self, key: CacheKey, refresh: Callable[[], Awaitable[Any]]) -> None:
+        if key in self._refreshing:
+            return
+
+        async def run() -> None:
+            try:
+                await refresh()
+            except Exception:
+                logger.warning("Background revalidation of %s failed", key[0], exc_info=True)
+            finally:
+                self._refreshing.pop(key, None)
+
+        # The refresh runs in an empty context, so it neither inherits the deadline of the call that
+        # found the stale entry nor fails once that call's budget has run out.
+        self._refreshing[key] = asyncio.create_task(run(), context=contextvars.Context())
+
+    def invalidate(self, method_path: str | None = None) -> None:
+        if method_path is None:
+            self._entries.clear()
+            return
+        for key in [key for key in self._entries if key[0] == method_path]:
+            del self._entries[key]
+
+    def cancel_pending(self) -> None:
+        for task in self._refreshing.values():
+            task.cancel()
+        self._refreshing.clear()
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import bisect
+import hashlib
+import math
+import time
+from typing import TYPE_CHECKING, Sequence
+
+if TYPE_CHECKING:
+    from fastgrpcio.calls.balancing import Endpoint
+
+
+def hash_key(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    def __init__(self, replicas: int = 160, load_factor: float = 1.25) -> None:
+        if load_factor < 1.0:
+            raise ValueError("load_factor must be at least 1.0")
+        self.replicas = replicas
+        self.load_factor = load_factor
+        self._points: list[int] = []
+        self._owners: list[str] = []
+        self._targets: frozenset[str] = frozenset()
+
+    def rebuild(self, targets: Sequence[str]) -> None:
+        wanted = frozenset(targets)
+        if wanted == self._targets:
+            return
+
+        ring = sorted(
+            (hash_key(f"{target}#{replica}"), target) for target in wanted for replica in range(self.replicas)
+        )
+        self._points = [point for point, _ in ring]
+        self._owners = [target for _, target in ring]
+        self._targets = wanted
+
+    def lookup(self, key: str, endpoints: dict[str, Endpoint]) -> Endpoint:
+        if not self._points:
+            raise RuntimeError("No endpoints available")
+
+        now = time.monotonic()
+        total_outstanding = sum(endpoint.outstanding for endpoint in endpoints.values())
+        capacity = math.ceil(self.load_factor * (total_outstanding + 1) / len(endpoints))
+
+        index = bisect.bisect(self._points, hash_key(key))
+        fallback: Endpoint | None = None
+        visited: set[str] = set()
+        for offset in range(len(self._points)):
+            target = self._owners[(index + offset) % len(self._owners)]
+            if target in visited:
+                continue
+            visited.add(target)
+
+            endpoint = endpoints[target]
+            if endpoint.is_ejected(now):
+                continue
+            if endpoint.outstanding + 1 <= capacity:
+                return endpoint
+            if fallback is None:
+                fallback = endpoint
+            if len(visited) == len(endpoints):
+                break
+
+        if fallback is not None:
+            return fallback
+        return endpoints[self._owners[index % len(self._owners)]]
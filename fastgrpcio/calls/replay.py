@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Callable
+
+from google.protobuf.message import Message
+
+logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S", level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def message_size(message: Any) -> int:
+    if isinstance(message, bytes):
+        return len(message)
+    if isinstance(message, Message):
+        size: int = message.ByteSize()
+        return size
+    return 0
+
+
+class ReplayBuffer:
+    def __init__(
+        self,
+        source: AsyncIterator[Any],
+        max_bytes: int,
+        encode: Callable[[Any], Any] = lambda item: item,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.overflowed = False
+        self._source = source.__aiter__()
+        self._encode = encode
+        self._messages: list[Any] = []
+        self._reader: asyncio.Future[Any] | None = None
+        self._exhausted = False
+
+    def _record(self, message: Any) -> None:
+        if self.overflowed:
+            return
+        self.size += message_size(message)
+        if self.size > self.max_bytes:
+            logger.debug("Request stream exceeded the %d byte replay buffer, disabling retries", self.max_bytes)
+            self.overflowed = True
+            self._messages.clear()
+            return
+        self._messages.append(message)
+
+    async def _next(self) -> Any:
+        if self._reader is None:
+            self._reader = asyncio.ensure_future(anext(self._source))
+        # The read is shielded so that cancelling an attempt mid-read doesn't tear down the
+        # caller's generator: the next attempt picks up the same pending message.
+        message = self._encode(await asyncio.shield(self._reader))
+        self._reader = None
+        self._record(message)
+        return message
+
+    async def replay(self) -> AsyncIterator[Any]:
+        if self.overflowed:
+            raise RuntimeError("Request stream overflowed the replay buffer and cannot be replayed")
+        for message in list(self._messages):
+            yield message
+        while not self._exhausted:
+            try:
+                message = await self._next()
+            except StopAsyncIteration:
+                self._exhausted = True
+                self._reader = None
+                return
+            yield message
+
+    async def close(self) -> None:
+        self._messages.clear()
+        if self._reader is not None:
+            self._reader.cancel()
+            await asyncio.gather(self._reader, return_exceptions=True)
+            self._reader = None
@@ -0,0 +1,84 @@
+import argparse
+import importlib
+import logging
+import sys
+from pathlib import Path
+from typing import Any
+
+from .exceptions import FastGRPCCompilationError
+from .fast_grpc import FastGRPC
+
+logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S", level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def load_app(path: str) -> FastGRPC:
+    module_name, _, attr = path.partition(":")
+    if not module_name or not attr:
+        raise FastGRPCCompilationError(f"App path should look like 'module:attribute', got '{path}'")
+
+    sys.path.insert(0, str(Path.cwd()))
+    module = importlib.import_module(module_name)
+    app: Any = module
+    for part in attr.split("."):
+        app = getattr(app, part)
+
+    if not isinstance(app, FastGRPC):
+        raise FastGRPCCompilationError(f"'{path}' is not an instance of {FastGRPC.__name__}")
+    return app
+
+
+def compile_app(app: FastGRPC, out_dir: Path, python_out: bool = True) -> list[Path]:
+    from grpc_tools import protoc
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    generated_package, app.generated_package = app.generated_package, None
+    try:
+        compiled = app.compile_services()
+    finally:
+        app.generated_package = generated_package
+
+    proto_files: list[Path] = []
+    for _, service_name, compiler in compiled:
+        proto_path = out_dir / compiler.file_proto.name
+        proto_path.write_text(compiler.render_proto())
+        proto_files.append(proto_path)
+        logger.info("Wrote %s for %s", proto_path, service_name)
+
+    if python_out:
+        for proto_path in proto_files:
+            code = protoc.main(
+                [
+                    "grpc_tools.protoc",
+                    f"-I{out_dir}",
+                    f"--python_out={out_dir}",
+                    f"--pyi_out={out_dir}",
+                    proto_path.name,
+                ]
+            )
+            if code != 0:
+                raise FastGRPCCompilationError(f"protoc failed for {proto_path} with exit code {code}")
+            logger.info("Generated Python module for %s", proto_path)
+        (out_dir / "__init__.py").touch()
+
+    return proto_files
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="fastgrpcio")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    compile_parser = subparsers.add_parser("compile", help="Emit .proto files and static _pb2 modules for an app")
+    compile_parser.add_argument("app", help="Import path of the FastGRPC app, e.g. 'main:app'")
+    compile_parser.add_argument("--out-dir", default="generated", help="Output directory (default: generated)")
+    compile_parser.add_argument("--proto-only", action="store_true", help="Only write .proto files")
+
+    args = parser.parse_args(argv)
+    if args.command == "compile":
+        app = load_app(args.app)
+        compile_app(app, Path(args.out_dir), python_out=not args.proto_only)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
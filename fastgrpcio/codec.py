@@ -0,0 +1,52 @@
+from typing import Any
+
+from google.protobuf.descriptor import FieldDescriptor
+from google.protobuf.message import Message
+
+
+def message_to_dict(message: Message) -> dict[str, Any]:
+    result: dict[str, Any] = {}
+    for field, value in message.ListFields():
+        if field.type == FieldDescriptor.TYPE_MESSAGE:
+            if field.is_repeated:
+                value = [message_to_dict(item) for item in value]
+            else:
+                value = message_to_dict(value)
+        elif field.is_repeated:
+            value = list(value)
+        result[field.name] = value
+    return result
+
+
+class EncodedMessage:
+    __slots__ = ("payload", "message_class", "_message")
+
+    def __init__(self, payload: bytes, message_class: type[Any]) -> None:
+        self.payload = payload
+        self.message_class = message_class
+        self._message: Any = None
+
+    @property
+    def decoded(self) -> bool:
+        return self._message is not None
+
+    @property
+    def message(self) -> Any:
+        if self._message is None:
+            self._message = self.message_class.FromString(self.payload)
+        return self._message
+
+    def __getattr__(self, name: str) -> Any:
+        # Middlewares that only pass the item along never decode it; reading a field decodes it once.
+        return getattr(self.message, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in EncodedMessage.__slots__:
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self.message, name, value)
+
+    def SerializeToString(self) -> bytes:
+        if self._message is None:
+            return self.payload
+        return self._message.SerializeToString()  # type: ignore[no-any-return]
@@ -0,0 +1,172 @@
+import hashlib
+import json
+import logging
+import os
+import sys
+from collections.abc import Callable, Iterable, Mapping
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from .options import MethodOptions
+from .schemas import BaseGRPCSchema
+
+logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S", level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = "2"
+
+_module_digests: dict[str, str | None] = {}
+
+
+class RPCSignature(NamedTuple):
+    request_model: type[BaseGRPCSchema]
+    response_model: type[BaseGRPCSchema]
+    client_stream: bool
+    server_stream: bool
+    batched_requests: bool = False
+
+
+class CachedCompilation(NamedTuple):
+    signatures: dict[str, RPCSignature]
+    descriptor: bytes
+
+
+def module_digest(module_name: str) -> str | None:
+    if module_name in _module_digests:
+        return _module_digests[module_name]
+    path = getattr(sys.modules.get(module_name), "__file__", None)
+    digest = None
+    if path is not None:
+        try:
+            digest = hashlib.sha256(Path(path).read_bytes()).hexdigest()
+        except OSError:
+            pass
+    _module_digests[module_name] = digest
+    return digest
+
+
+def _model_modules(model: type[BaseGRPCSchema], seen: set[type[Any]]) -> Iterable[str]:
+    if model in seen:
+        return
+    seen.add(model)
+
+    for base in model.__mro__:
+        if isinstance(base, type) and issubclass(base, BaseGRPCSchema):
+            yield base.__module__
+    for _, field_type, _ in model.iterate_by_model_fields():
+        candidates: tuple[Any, ...] = (field_type, *getattr(field_type, "__args__", ()))
+        for candidate in candidates:
+            if isinstance(candidate, type) and issubclass(candidate, BaseGRPCSchema):
+                yield from _model_modules(candidate, seen)
+
+
+def _model_ref(model: type[BaseGRPCSchema]) -> str | None:
+    if "<locals>" in model.__qualname__:
+        return None
+    return f"{model.__module__}:{model.__qualname__}"
+
+
+def _resolve_model(ref: str) -> type[BaseGRPCSchema] | None:
+    module_name, _, qualname = ref.partition(":")
+    obj: Any = sys.modules.get(module_name)
+    for name in qualname.split("."):
+        obj = getattr(obj, name, None)
+    if isinstance(obj, type) and issubclass(obj, BaseGRPCSchema):
+        return obj
+    return None
+
+
+class CompileCache:
+    def __init__(self, cache_dir: str | os.PathLike[str]) -> None:
+        self.cache_dir = Path(cache_dir)
+
+    def make_key(
+        self,
+        package: str,
+        service: str,
+        funcs: Mapping[str, Callable[..., Any]],
+        options: Mapping[str, MethodOptions],
+    ) -> str:
+        # The key only names the handlers; the contents of the modules they and their models are
+        # defined in are checked against the digests stored in the entry when it is loaded.
+        digest = hashlib.sha256()
+        digest.update(f"{CACHE_FORMAT_VERSION}:{package}:{service}".encode())
+        for func_name, func in funcs.items():
+            method_options = options.get(func_name) or MethodOptions()
+            digest.update(
+                f"rpc:{func_name}:{func.__module__}:{func.__qualname__}:"
+                f"{method_options.concurrency is not None}:{method_options.batch}".encode()
+            )
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.desc"
+
+    def load(self, key: str) -> CachedCompilation | None:
+        try:
+            payload = self._path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+        except OSError as err:
+            logger.warning("Failed to read compile cache entry %s: %s", key, err)
+            return None
+
+        header, _, descriptor = payload.partition(b"\n")
+        try:
+            entry = json.loads(header)
+            modules: dict[str, str] = entry["modules"]
+            methods: dict[str, list[Any]] = entry["methods"]
+            if any(module_digest(module_name) != digest for module_name, digest in modules.items()):
+                return None
+
+            signatures: dict[str, RPCSignature] = {}
+            for func_name, (request_ref, response_ref, *flags) in methods.items():
+                request_model = _resolve_model(request_ref)
+                response_model = _resolve_model(response_ref)
+                if request_model is None or response_model is None:
+                    return None
+                signatures[func_name] = RPCSignature(request_model, response_model, *flags)
+        except (ValueError, KeyError, TypeError, AttributeError):
+            # Covers undecodable headers as well as entries written in an older or unexpected shape.
+            logger.warning("Ignoring corrupt compile cache entry %s", key)
+            return None
+        return CachedCompilation(signatures, descriptor)
+
+    def store(
+        self,
+        key: str,
+        funcs: Mapping[str, Callable[..., Any]],
+        signatures: Mapping[str, RPCSignature],
+        descriptor: bytes,
+    ) -> None:
+        module_names = {__name__, "fastgrpcio.grpc_compiler"}
+        methods: dict[str, list[Any]] = {}
+        seen: set[type[Any]] = set()
+        for func_name, func in funcs.items():
+            request_model, response_model, *flags = signatures[func_name]
+            request_ref, response_ref = _model_ref(request_model), _model_ref(response_model)
+            if request_ref is None or response_ref is None:
+                logger.info("Not caching %s: models defined inside functions can't be looked up again", key)
+                return
+            methods[func_name] = [request_ref, response_ref, *flags]
+            module_names.add(func.__module__)
+            for model in (request_model, response_model):
+                module_names.update(_model_modules(model, seen))
+
+        modules: dict[str, str] = {}
+        for module_name in module_names:
+            digest = module_digest(module_name)
+            if digest is None:
+                logger.info("Not caching %s: module %s has no source file", key, module_name)
+                return
+            modules[module_name] = digest
+
+        header = json.dumps({"modules": modules, "methods": methods}, separators=(",", ":")).encode()
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_bytes(header + b"\n" + descriptor)
+            os.replace(tmp_path, path)
+        except OSError as err:
+            logger.warning("Failed to write compile cache entry %s: %s", key, err)
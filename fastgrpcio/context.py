@@ -1,40 +1,187 @@
-from typing import Annotated
+import time
+from contextvars import ContextVar, Token
+from typing import Annotated, Any
 
 import grpc
+from google.protobuf.field_mask_pb2 import FieldMask
 from grpc._cython.cygrpc import _ServicerContext
 from grpc.aio._typing import MetadataType
 from pydantic import SkipValidation
 
+CACHE_CONTROL_METADATA_KEY = "cache-control"
 
-class ContextWrapper:
-    def __init__(self, context: _ServicerContext, trace_ctx: dict[str, str] | None = None) -> None:
-        if trace_ctx is None:
-            trace_ctx = {}
-        self._context = context
-        self._trace_ctx = trace_ctx
+_current_deadline: ContextVar[float | None] = ContextVar("fastgrpcio_current_deadline", default=None)
 
-    def __getattr__(self, name: str):
-        return self._context
+
+def current_deadline() -> float | None:
+    return _current_deadline.get()
+
+
+def remaining_budget() -> float | None:
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def set_current_deadline(time_remaining: float | None) -> Token[float | None]:
+    deadline = None if time_remaining is None else time.monotonic() + time_remaining
+    return _current_deadline.set(deadline)
+
+
+def reset_current_deadline(token: Token[float | None]) -> None:
+    try:
+        _current_deadline.reset(token)
+    except ValueError:
+        # Streaming handlers may be finalized outside of the context that set the token.
+        _current_deadline.set(None)
 
 
 class Context:
-    def __init__(self, grpc_context: ContextWrapper) -> None:
-        self.grpc_context = grpc_context
+    __slots__ = ("_context", "_trace_ctx", "_metadata", "_binary_metadata", "_meta", "field_mask")
+
+    def __init__(self, context: _ServicerContext | None, trace_ctx: dict[str, str] | None = None) -> None:
+        self.reset(context, trace_ctx)
+
+    def reset(self, context: _ServicerContext | None, trace_ctx: dict[str, str] | None = None) -> None:
+        self._context: Any = context
+        self._trace_ctx: dict[str, str] = trace_ctx if trace_ctx is not None else {}
+        self._metadata: dict[str, str] | None = None
+        self._binary_metadata: dict[str, bytes] | None = None
+        self._meta: dict[str, str] | None = None
+        self.field_mask: FieldMask | None = None
+
+    def _parse_metadata(self) -> None:
+        metadata: dict[str, str] = {}
+        binary_metadata: dict[str, bytes] = {}
+        for key, value in self._context.invocation_metadata() or ():
+            if isinstance(value, bytes):
+                binary_metadata[key] = value
+            else:
+                metadata[key] = value
+        self._metadata = metadata
+        self._binary_metadata = binary_metadata
 
     @property
-    def meta(self) -> dict[str, str]:
-        metadata = {key: value for key, value in self.grpc_context._context.invocation_metadata()}
-        metadata.update(self.trace_context)
-        return metadata
+    def grpc_context(self) -> "Context":
+        return self
 
-    async def abort(self, code: grpc.StatusCode, details: str = "", trailing_metadata: MetadataType = ()) -> None:
-        await self.grpc_context._context.abort(code, details, trailing_metadata)
+    @property
+    def metadata(self) -> dict[str, str]:
+        if self._metadata is None:
+            self._parse_metadata()
+        return self._metadata  # type: ignore[return-value]
+
+    def get_metadata(self, key: str) -> str | None:
+        # Looking up a single key scans the raw pairs instead of building both dicts, which most
+        # calls never need.
+        if self._metadata is not None:
+            return self._metadata.get(key)
+        value = None
+        for metadata_key, metadata_value in self._context.invocation_metadata() or ():
+            if metadata_key == key and not isinstance(metadata_value, bytes):
+                value = metadata_value
+        return value
+
+    @property
+    def binary_metadata(self) -> dict[str, bytes]:
+        if self._binary_metadata is None:
+            self._parse_metadata()
+        return self._binary_metadata  # type: ignore[return-value]
+
+    @property
+    def meta(self) -> dict[str, str]:
+        if self._meta is None:
+            self._meta = {**self.metadata, **self._trace_ctx}
+        return self._meta
 
     @property
     def trace_context(self) -> dict[str, str]:
-        return self.grpc_context._trace_ctx
+        return self._trace_ctx
 
+    def update_trace_context(self, trace_ctx: dict[str, str]) -> None:
+        self._trace_ctx.update(trace_ctx)
+        self._meta = None
 
+    @property
+    def peer(self) -> str:
+        return self._context.peer()  # type: ignore[no-any-return]
 
-GRPCContext = Annotated[Context, SkipValidation()]
+    def time_remaining(self) -> float | None:
+        return self._context.time_remaining()  # type: ignore[no-any-return]
 
+    @property
+    def authorization(self) -> str | None:
+        return self.metadata.get("authorization")
+
+    @property
+    def bearer_token(self) -> str | None:
+        authorization = self.authorization
+        if authorization is None:
+            return None
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return None
+        return token.strip()
+
+    def wants(self, path: str) -> bool:
+        if self.field_mask is None:
+            return True
+        for mask_path in self.field_mask.paths:
+            if mask_path == path or path.startswith(f"{mask_path}.") or mask_path.startswith(f"{path}."):
+                return True
+        return False
+
+    def invocation_metadata(self) -> MetadataType:
+        return self._context.invocation_metadata()
+
+    def set_trailing_metadata(self, trailing_metadata: MetadataType) -> None:
+        self._context.set_trailing_metadata(trailing_metadata)
+
+    def add_trailing_metadata(self, *trailing_metadata: tuple[str, str | bytes]) -> None:
+        existing = tuple(self._context.trailing_metadata() or ())
+        self._context.set_trailing_metadata(existing + trailing_metadata)
+
+    def set_cache_control(
+        self,
+        max_age: float,
+        stale_while_revalidate: float | None = None,
+        private: bool = False,
+    ) -> None:
+        value = f"max-age={max_age:g}"
+        if stale_while_revalidate is not None:
+            value += f", stale-while-revalidate={stale_while_revalidate:g}"
+        if private:
+            value += ", private"
+        self.add_trailing_metadata((CACHE_CONTROL_METADATA_KEY, value))
+
+    async def abort(self, code: grpc.StatusCode, details: str = "", trailing_metadata: MetadataType = ()) -> None:
+        await self._context.abort(code, details, trailing_metadata)
+
+    async def abort_with_status(self, status: grpc.Status) -> None:
+        await self._context.abort_with_status(status)
+
+
+class ContextPool:
+    __slots__ = ("_free", "maxsize")
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self._free: list[Context] = []
+        self.maxsize = maxsize
+
+    def acquire(self, context: _ServicerContext) -> Context:
+        if self._free:
+            ctx = self._free.pop()
+            ctx.reset(context)
+            return ctx
+        return Context(context)
+
+    def release(self, ctx: Context) -> None:
+        if len(self._free) < self.maxsize:
+            ctx.reset(None)
+            self._free.append(ctx)
+
+
+ContextWrapper = Context
+
+GRPCContext = Annotated[Context, SkipValidation()]
@@ -8,3 +8,15 @@ class FastGRPCMiddlewareError(Exception):
 
 class FastGRPCError(Exception):
     pass
+
+
+class BlobIntegrityError(FastGRPCError):
+    pass
+
+
+class CircuitOpenError(FastGRPCError):
+    def __init__(self, target: str, method: str, retry_after: float) -> None:
+        super().__init__(f"Circuit for {method} on {target} is open, retry in {retry_after:.1f}s")
+        self.target = target
+        self.method = method
+        self.retry_after = retry_after
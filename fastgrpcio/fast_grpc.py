@@ -1,19 +1,79 @@
+import asyncio
 import logging
-from collections.abc import Callable
+import os
+import signal
+import socket
+import stat
+import time
+from collections.abc import Callable, Sequence
 from concurrent import futures
-from typing import Any, Generator
+from contextlib import AbstractAsyncContextManager, nullcontext
+from typing import Any, AsyncIterator, Generator
 
 import grpc
+from grpc_health.v1 import health, health_pb2, health_pb2_grpc
 from grpc_reflection.v1alpha import reflection
 
-from .exceptions import FastGRPCError, FastGRPCMiddlewareError
+from .context import ContextPool, GRPCContext
+from .exceptions import FastGRPCError
 from .grpc_compiler import GRPCCompiler
-from .middlewares import BaseMiddleware, LoggingMiddleware
+from .lifecycle import InFlightTracker, ServerState
+from .load_reporting import LoadReport, LoadReporter, LoadReportingMiddleware, LoadReportRequest
+from .middlewares import BaseMiddleware, LoggingMiddleware, check_middleware
+from .options import MethodOptions
+from .scheduling import Scheduler
 
 logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S", level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def unix_socket_path(address: str) -> str | None:
+    if not address.startswith("unix:"):
+        return None
+    path = address.removeprefix("unix:")
+    if path.startswith("//"):
+        path = path.removeprefix("//")
+    return path
+
+
+def _remove_stale_socket(path: str) -> None:
+    # A socket file left behind by a previous run would make the bind fail, but one that still
+    # accepts connections belongs to a running server and must not be taken over.
+    try:
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            return
+    except FileNotFoundError:
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+        except ConnectionRefusedError:
+            os.unlink(path)
+            return
+        except FileNotFoundError:
+            return
+    raise FastGRPCError(f"Unix socket {path} is already in use by another process")
+
+
+def _registrar(
+    functions: dict[str, Callable[..., Any]],
+    options: dict[str, MethodOptions],
+    name: str,
+    method_options: MethodOptions,
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        if name in functions.keys():
+            raise ValueError(f"Function with name '{name}' is already registered.")
+        if func in functions.values():
+            raise ValueError(f"Function '{func.__name__}' is already registered.")
+
+        functions[name] = func
+        options[name] = method_options
+        return func
+
+    return decorator
+
+
 class FastGRPCRouter:
     def __init__(
         self,
@@ -23,18 +83,41 @@ class FastGRPCRouter:
         self.app_name = app_name
         self.app_package_name = app_package_name
         self._functions: dict[str, Callable[..., Any]] = {}
+        self._options: dict[str, MethodOptions] = {}
+        self._middlewares: list[BaseMiddleware] = []
 
-    def register_as(self, name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
-        def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
-            if name in self._functions.keys():
-                raise ValueError(f"Function with name '{name}' is already registered.")
-            if func in self._functions.values():
-                raise ValueError(f"Function '{func.__name__}' is already registered.")
-
-            self._functions[name] = func
-            return func
+    def register_as(
+        self,
+        name: str,
+        *,
+        min_deadline: float | None = None,
+        concurrency: int | None = None,
+        ordered: bool = True,
+        prefetch: int | None = None,
+        batch_size: int = 100,
+        batch_linger: float = 0.05,
+        batch: bool = False,
+        batch_concurrency: int = 16,
+        middlewares: Sequence[BaseMiddleware] = (),
+        priority: str | None = None,
+    ) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        method_options = MethodOptions(
+            min_deadline=min_deadline,
+            concurrency=concurrency,
+            ordered=ordered,
+            prefetch=prefetch,
+            batch_size=batch_size,
+            batch_linger=batch_linger,
+            batch=batch,
+            batch_concurrency=batch_concurrency,
+            middlewares=tuple(middlewares),
+            priority=priority,
+        )
+        return _registrar(self._functions, self._options, name, method_options)
 
-        return decorator
+    def add_middleware(self, middleware: BaseMiddleware) -> None:
+        check_middleware(middleware)
+        self._middlewares.append(middleware)
 
 
 class FastGRPC:
@@ -42,84 +125,305 @@ class FastGRPC:
         self,
         app_name: str = "FastGRPCApp",
         app_package_name: str = "fast_grpc_app",
-        port: int = 50051,
+        port: int | None = 50051,
         worker_count: int = 10,
+        compile_cache_dir: str | os.PathLike[str] | None = None,
+        warmup: bool = False,
+        generated_package: str | None = None,
+        context_pool_size: int = 0,
+        grace_period: float = 30.0,
+        lifespan: Callable[["FastGRPC"], AbstractAsyncContextManager[Any]] | None = None,
+        scheduler: Scheduler | None = None,
+        listeners: Sequence[str] = (),
+        unix_socket_mode: int | None = None,
     ):
         self.app_name = app_name
         self.app_package_name = app_package_name
         self.port = port
+        self.listeners = list(listeners)
+        self.unix_socket_mode = unix_socket_mode
         self.worker_count = worker_count
+        self.compile_cache_dir = compile_cache_dir
+        self.warmup = warmup
+        self.generated_package = generated_package
+        self.context_pool = ContextPool(context_pool_size) if context_pool_size > 0 else None
+        self.grace_period = grace_period
+        self.lifespan = lifespan
+        self.scheduler = scheduler
+
+        self.state: ServerState = "created"
+        self.inflight = InFlightTracker()
+        self.health_servicer = health.aio.HealthServicer()
+        self._stop_event: asyncio.Event | None = None
+        self._drain_started_at: float | None = None
+        self._service_names: list[str] = []
+        self.load_reporter: LoadReporter | None = None
 
         self._functions: dict[str, Callable[..., Any]] = {}
+        self._options: dict[str, MethodOptions] = {}
         self._middlewares: list[BaseMiddleware] = [LoggingMiddleware()]
         self._routers: list[FastGRPCRouter] = []
+        self._compiled: list[tuple[dict[str, Callable[..., Any]], str, GRPCCompiler]] | None = None
 
-    def register_as(self, name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
-        def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
-            if name in self._functions.keys():
-                raise ValueError(f"Function with name '{name}' is already registered.")
-            if func in self._functions.values():
-                raise ValueError(f"Function '{func.__name__}' is already registered.")
-
-            self._functions[name] = func
-            return func
+    def register_as(
+        self,
+        name: str,
+        *,
+        min_deadline: float | None = None,
+        concurrency: int | None = None,
+        ordered: bool = True,
+        prefetch: int | None = None,
+        batch_size: int = 100,
+        batch_linger: float = 0.05,
+        batch: bool = False,
+        batch_concurrency: int = 16,
+        middlewares: Sequence[BaseMiddleware] = (),
+        priority: str | None = None,
+    ) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        method_options = MethodOptions(
+            min_deadline=min_deadline,
+            concurrency=concurrency,
+            ordered=ordered,
+            prefetch=prefetch,
+            batch_size=batch_size,
+            batch_linger=batch_linger,
+            batch=batch,
+            batch_concurrency=batch_concurrency,
+            middlewares=tuple(middlewares),
+            priority=priority,
+        )
+        return _registrar(self._functions, self._options, name, method_options)
 
-        return decorator
+    def _check_not_compiled(self, action: str) -> None:
+        # Compiled services have their middleware chains and routers baked in, so later changes
+        # would silently never take effect.
+        if self._compiled is not None:
+            raise RuntimeError(f"Cannot {action} after services have been compiled")
 
     def add_middleware(self, middleware: BaseMiddleware) -> None:
-        if issubclass(type(middleware), BaseMiddleware):
-            self._middlewares.append(middleware)
-            return
-        raise FastGRPCMiddlewareError(f"Middleware should be instance of {BaseMiddleware.__name__}")
+        self._check_not_compiled("add middleware")
+        check_middleware(middleware)
+        self._middlewares.append(middleware)
 
     def include_router(self, router: FastGRPCRouter) -> None:
+        self._check_not_compiled("include a router")
         if issubclass(type(router), FastGRPCRouter):
             self._routers.append(router)
             return
         raise FastGRPCError("Router should be instance of FastGRPCRouter")
 
-    def _compile(self, funcs: dict[str, Callable[..., Any]]) -> tuple[dict[str, Callable[..., Any]], str, GRPCCompiler]:
-        compiler = GRPCCompiler(
-            app_name=self.app_name,
-            app_package_name=self.app_package_name,
-            middlewares=self._middlewares,
+    def _make_compiler(
+        self,
+        app_name: str,
+        app_package_name: str,
+        middlewares: list[BaseMiddleware],
+    ) -> GRPCCompiler:
+        return GRPCCompiler(
+            app_name=app_name,
+            app_package_name=app_package_name,
+            middlewares=middlewares,
+            cache_dir=self.compile_cache_dir,
+            generated_package=self.generated_package,
+            context_pool=self.context_pool,
+            inflight=self.inflight,
+            scheduler=self.scheduler,
         )
-        handlers, service_name = compiler.compile(funcs)
+
+    def _compile(
+        self,
+        funcs: dict[str, Callable[..., Any]],
+        options: dict[str, MethodOptions] | None = None,
+    ) -> tuple[dict[str, Callable[..., Any]], str, GRPCCompiler]:
+        compiler = self._make_compiler(self.app_name, self.app_package_name, self._middlewares)
+        handlers, service_name = compiler.compile(funcs, options)
         return handlers, service_name, compiler
 
-    def _compile_routers(self) -> Generator[tuple[dict[str, Callable[..., Any]], str], None, None]:
+    def _compile_routers(self) -> Generator[tuple[dict[str, Callable[..., Any]], str, GRPCCompiler], None, None]:
         for router in self._routers:
-            compiler = GRPCCompiler(
-                app_name=router.app_name,
-                app_package_name=router.app_package_name,
-                middlewares=self._middlewares,
+            compiler = self._make_compiler(
+                router.app_name, router.app_package_name, [*self._middlewares, *router._middlewares]
             )
-            handlers, service_name = compiler.compile(router._functions)
-            yield handlers, service_name
+            handlers, service_name = compiler.compile(router._functions, router._options)
+            yield handlers, service_name, compiler
+
+    def compile_services(self) -> list[tuple[dict[str, Callable[..., Any]], str, GRPCCompiler]]:
+        # Descriptors can only be added to the default pool once, so a test client and a real
+        # server started from the same app share one compilation.
+        if self._compiled is None:
+            compiled = [self._compile(self._functions, self._options)]
+            compiled.extend(self._compile_routers())
+            self._compiled = compiled
+        return self._compiled
+
+    def enable_load_reporting(
+        self,
+        interval: float = 1.0,
+        queue_depth: Callable[[], int] | None = None,
+    ) -> LoadReporter:
+        if self.load_reporter is not None:
+            return self.load_reporter
+        self._check_not_compiled("enable load reporting")
+
+        if queue_depth is None and self.scheduler is not None:
+            queue_depth = self.scheduler.queue_depth
+        reporter = LoadReporter(self.inflight, queue_depth=queue_depth, sample_interval=interval)
+        self.load_reporter = reporter
+        self.add_middleware(LoadReportingMiddleware(reporter))
+
+        router = FastGRPCRouter(app_name="LoadReporter", app_package_name="fastgrpcio_load")
+
+        # The report stream lives as long as the subscriber, so keep it out of bounded budgets.
+        unbounded = (
+            [name for name, lane in self.scheduler.lanes.items() if lane.budget is None] if self.scheduler else []
+        )
+
+        @router.register_as("StreamLoad", priority=unbounded[0] if unbounded else None)
+        async def stream_load(data: LoadReportRequest, context: GRPCContext) -> AsyncIterator[LoadReport]:
+            report_interval = data.interval or interval
+            while self.state == "serving":
+                yield reporter.snapshot()
+                await asyncio.sleep(report_interval)
+
+        self.include_router(router)
+        return reporter
+
+    async def set_service_status(self, service_name: str, serving: bool) -> None:
+        status = health_pb2.HealthCheckResponse.SERVING if serving else health_pb2.HealthCheckResponse.NOT_SERVING
+        await self.health_servicer.set(service_name, status)
+
+    def drain_status(self) -> dict[str, Any]:
+        elapsed = time.monotonic() - self._drain_started_at if self._drain_started_at is not None else 0.0
+        return {
+            "state": self.state,
+            "in_flight_unary": self.inflight.unary,
+            "in_flight_streams": self.inflight.streams,
+            "drain_elapsed": elapsed,
+            "grace_period": self.grace_period,
+        }
+
+    def shutdown(self) -> None:
+        if self._stop_event is not None:
+            self._stop_event.set()
+
+    def _install_signal_handlers(self, loop: asyncio.AbstractEventLoop) -> list[signal.Signals]:
+        installed: list[signal.Signals] = []
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, self.shutdown)
+            except (NotImplementedError, RuntimeError):
+                continue
+            installed.append(sig)
+        return installed
+
+    async def _drain(self, server: grpc.aio.Server) -> None:
+        self.state = "draining"
+        self._drain_started_at = time.monotonic()
+        logger.info("Draining gRPC server, grace period %.1fs", self.grace_period)
+        await self.health_servicer.enter_graceful_shutdown()
+
+        stop_task = asyncio.create_task(server.stop(self.grace_period))
+        while not stop_task.done():
+            logger.info(
+                "Draining: %d unary calls and %d streams in flight",
+                self.inflight.unary,
+                self.inflight.streams,
+            )
+            await asyncio.wait({stop_task}, timeout=1.0)
+        await stop_task
+
+        self.state = "stopped"
+        logger.info("Server stopped after %.1fs", time.monotonic() - self._drain_started_at)
+
+    @property
+    def addresses(self) -> list[str]:
+        addresses = [f"[::]:{self.port}"] if self.port is not None else []
+        addresses.extend(self.listeners)
+        return addresses
+
+    def _bind(self, server: grpc.aio.Server) -> list[str]:
+        if not self.addresses:
+            raise FastGRPCError("Server has no port or listeners to bind")
+
+        socket_paths: list[str] = []
+        for address in self.addresses:
+            path = unix_socket_path(address)
+            if path is None:
+                server.add_insecure_port(address)
+                continue
+            _remove_stale_socket(path)
+            if self.unix_socket_mode is None:
+                server.add_insecure_port(address)
+            else:
+                # The socket file is created by the bind, so it gets its mode from the umask right
+                # away instead of being reachable by anyone until a later chmod.
+                previous_umask = os.umask(0o777 & ~self.unix_socket_mode)
+                try:
+                    server.add_insecure_port(address)
+                finally:
+                    os.umask(previous_umask)
+            socket_paths.append(path)
+        return socket_paths
+
+    @staticmethod
+    def _remove_sockets(socket_paths: list[str]) -> None:
+        for path in socket_paths:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                continue
 
     async def serve(self) -> Any:
         logger.info("Starting gRPC server...")
+        self.state = "starting"
         server = grpc.aio.server(futures.ThreadPoolExecutor(self.worker_count))
         service_names = [
             reflection.SERVICE_NAME,
+            health.SERVICE_NAME,
         ]
-        try:
-            handlers, service, compiler = self._compile(self._functions)
+        compiled = self.compile_services()
+        self._service_names = []
+        for handlers, service, _ in compiled:
             generic_handler = grpc.method_handlers_generic_handler(service, handlers)
             service_names.append(service)
+            self._service_names.append(service)
             server.add_generic_rpc_handlers((generic_handler,))
-        except Exception:
-            raise
-        try:
-            for router_handlers, route_service in self._compile_routers():
-                generic_handler = grpc.method_handlers_generic_handler(route_service, router_handlers)
-                service_names.append(route_service)
-                server.add_generic_rpc_handlers((generic_handler,))
-        except Exception:
-            raise
-
-        server.add_insecure_port(f"[::]:{self.port}")
+
+        if self.warmup:
+            for _, _, compiler in compiled:
+                compiler.warmup()
+
+        socket_paths = self._bind(server)
         reflection.enable_server_reflection(service_names, server)
-        await server.start()
-        logger.info(f"Server started at [::]:{self.port}")
-        await server.wait_for_termination()
+        health_pb2_grpc.add_HealthServicer_to_server(self.health_servicer, server)
+
+        lifespan = self.lifespan(self) if self.lifespan is not None else nullcontext()
+        async with lifespan:
+            loop = asyncio.get_running_loop()
+            self._stop_event = asyncio.Event()
+            installed_signals = self._install_signal_handlers(loop)
+            waiters: set[asyncio.Task[Any]] = set()
+            drained = False
+            try:
+                await server.start()
+                await self.set_service_status("", True)
+                for service in self._service_names:
+                    await self.set_service_status(service, True)
+                self.state = "serving"
+                logger.info(f"Server started at {', '.join(self.addresses)}")
+
+                waiters = {
+                    asyncio.create_task(self._stop_event.wait()),
+                    asyncio.create_task(server.wait_for_termination()),
+                }
+                await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+                await self._drain(server)
+                drained = True
+            finally:
+                for waiter in waiters:
+                    waiter.cancel()
+                for sig in installed_signals:
+                    loop.remove_signal_handler(sig)
+                if not drained:
+                    await server.stop(None)
+                    self.state = "stopped"
+                self._remove_sockets(socket_paths)
@@ -0,0 +1,73 @@
+from functools import lru_cache
+from typing import Any
+
+import grpc
+from google.protobuf.field_mask_pb2 import FieldMask
+from google.protobuf.message import Message
+
+from fastgrpcio.context import Context
+
+FIELD_MASK_METADATA_KEY = "x-field-mask"
+FIELD_MASK_REQUEST_FIELD = "read_mask"
+
+
+def parse_field_mask(value: str | list[str]) -> FieldMask | None:
+    paths = value.split(",") if isinstance(value, str) else value
+    paths = [path.strip() for path in paths if path.strip()]
+    if not paths or "*" in paths:
+        return None
+    return FieldMask(paths=paths)
+
+
+@lru_cache(maxsize=1024)
+def _include(paths: tuple[str, ...]) -> dict[str, Any]:
+    include: dict[str, Any] = {}
+    for path in paths:
+        node = include
+        *parents, leaf = path.split(".")
+        for name in parents:
+            child = node.get(name)
+            if child is True:
+                break
+            node = node.setdefault(name, {})
+        else:
+            node[leaf] = True
+    return include
+
+
+def field_mask_include(field_mask: FieldMask) -> dict[str, Any]:
+    return _include(tuple(field_mask.paths))
+
+
+async def resolve_field_mask(
+    context: Context,
+    response_class: type[Any],
+    request: Message | None = None,
+) -> FieldMask | None:
+    field_mask: FieldMask | None = None
+    if request is not None and FIELD_MASK_REQUEST_FIELD in request.DESCRIPTOR.fields_by_name:
+        field_mask = parse_field_mask(list(getattr(request, FIELD_MASK_REQUEST_FIELD)))
+    if field_mask is None:
+        value = context.get_metadata(FIELD_MASK_METADATA_KEY)
+        if value:
+            field_mask = parse_field_mask(value)
+    if field_mask is None:
+        context.field_mask = None
+        return None
+    if not field_mask.IsValidForDescriptor(response_class.DESCRIPTOR):
+        await context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"Invalid field mask: {', '.join(field_mask.paths)}")
+    context.field_mask = field_mask
+    return field_mask
+
+
+def build_response(result: Any, response_class: type[Any], field_mask: FieldMask | None) -> Any:
+    if field_mask is None:
+        if isinstance(result, response_class):
+            return result
+        return response_class(**result.model_dump())
+    if isinstance(result, response_class):
+        pruned = response_class()
+        field_mask.MergeMessage(result, pruned)
+        return pruned
+    # Dumping only the masked fields skips converting the ones that would be pruned anyway.
+    return response_class(**result.model_dump(include=field_mask_include(field_mask)))
@@ -1,13 +1,26 @@
+import importlib
 import logging
+import os
+from types import ModuleType
 from typing import Any, AsyncIterator, Callable, get_args, get_origin, get_type_hints
 
 import grpc
 from google.protobuf import descriptor_pb2, descriptor_pool, message_factory
 from google.protobuf.descriptor_pb2 import ServiceDescriptorProto
 from google.protobuf.message_factory import GetMessageClass
-
+from pydantic import ValidationError
+
+from .batching import make_batch_function
+from .codec import EncodedMessage, message_to_dict
+from .compile_cache import CachedCompilation, CompileCache, RPCSignature
+from .context import ContextPool
+from .exceptions import FastGRPCCompilationError
+from .field_masks import build_response
+from .lifecycle import InFlightTracker
 from .middlewares import BaseMiddleware
-from .mixins import CreateHandlersMixins
+from .mixins import CreateHandlersMixins, LazyInjected
+from .options import MethodOptions
+from .scheduling import Scheduler
 from .schemas import BaseGRPCSchema
 
 logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S", level=logging.INFO)
@@ -22,6 +35,14 @@ PYTHON_TO_PROTO_TYPE: dict[type[Any], int] = {
     bytes: descriptor_pb2.FieldDescriptorProto.TYPE_BYTES,
 }
 
+SAMPLE_VALUES: dict[type[Any], Any] = {
+    int: 1,
+    float: 1.0,
+    bool: True,
+    str: "x",
+    bytes: b"x",
+}
+
 PYTHON_TO_LABEL_TYPE: dict[str, int] = {
     "optional": descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL,
     "repeated": descriptor_pb2.FieldDescriptorProto.LABEL_REPEATED,
@@ -35,6 +56,11 @@ class GRPCCompiler(CreateHandlersMixins):
         app_name: str,
         app_package_name: str,
         middlewares: list[BaseMiddleware],
+        cache_dir: str | os.PathLike[str] | None = None,
+        generated_package: str | None = None,
+        context_pool: ContextPool | None = None,
+        inflight: InFlightTracker | None = None,
+        scheduler: Scheduler | None = None,
     ):
         self.file_proto = descriptor_pb2.FileDescriptorProto()
         self.app_name = app_name
@@ -48,10 +74,16 @@ class GRPCCompiler(CreateHandlersMixins):
         self.factory = message_factory.MessageFactory(self.pool)
         self.method_handlers: dict[str, Callable[..., Any]] = {}
         self.generated_messages: set[str] = set()
-
-    def _extract_pydantic_models(
-        self, func: Callable[..., Any]
-    ) -> tuple[type[BaseGRPCSchema], type[BaseGRPCSchema], bool, bool]:
+        self.cache = CompileCache(cache_dir) if cache_dir is not None else None
+        self.generated_package = generated_package
+        self.context_pool = context_pool
+        self.method_options: dict[str, MethodOptions] = {}
+        self.inflight = inflight
+        self.scheduler = scheduler
+        self._compiled_models: list[tuple[type[BaseGRPCSchema], type[BaseGRPCSchema], type[Any], type[Any]]] = []
+        self._injectors: list[LazyInjected] = []
+
+    def _extract_pydantic_models(self, func: Callable[..., Any]) -> RPCSignature:
         hints: dict[str, Any] = get_type_hints(func)
 
         request_model: type[BaseGRPCSchema] | None = None
@@ -59,6 +91,7 @@ class GRPCCompiler(CreateHandlersMixins):
 
         client_stream = False
         server_stream = False
+        batched_requests = False
 
         for key, val in hints.items():
             origin = get_origin(val)
@@ -77,6 +110,9 @@ class GRPCCompiler(CreateHandlersMixins):
 
             if origin is get_origin(AsyncIterator):
                 inner = get_args(val)[0]
+                if get_origin(inner) is list:
+                    inner = get_args(inner)[0]
+                    batched_requests = True
                 if isinstance(inner, type) and issubclass(inner, BaseGRPCSchema):
                     request_model = inner
                     client_stream = True
@@ -88,7 +124,7 @@ class GRPCCompiler(CreateHandlersMixins):
         if not request_model or not response_model:
             raise ValueError(f"Function {func.__name__} must have both request and response Pydantic models")
 
-        return request_model, response_model, client_stream, server_stream
+        return RPCSignature(request_model, response_model, client_stream, server_stream, batched_requests)
 
     def _create_message(self, model: type[BaseGRPCSchema]) -> None:
         if model.__name__ in self.generated_messages:
@@ -171,38 +207,255 @@ class GRPCCompiler(CreateHandlersMixins):
         func_name: str,
         client_stream: bool = False,
         server_stream: bool = False,
+        batched_requests: bool = False,
     ) -> Callable[..., Any]:
         if not client_stream and not server_stream:
             return self._make_unary_handler(user_func, request_model, response_class, func_name)
         if not client_stream and server_stream:
             return self._make_server_stream_handler(user_func, request_model, response_class, func_name)
         if client_stream and not server_stream:
+            if batched_requests:
+                options = self.method_options.get(func_name) or MethodOptions()
+                return self._make_batched_client_stream_handler(
+                    user_func, request_model, response_class, func_name, options.batch_size, options.batch_linger
+                )
             return self._make_client_stream_handler(user_func, request_model, response_class, func_name)
         if client_stream and server_stream:
+            options = self.method_options.get(func_name) or MethodOptions()
+            if options.concurrency is not None:
+                return self._make_concurrent_stream_handler(
+                    user_func, request_model, response_class, func_name, options.concurrency, options.ordered
+                )
             return self._make_bidi_stream_handler(user_func, request_model, response_class, func_name)
 
         raise ValueError(f"Failed to determine RPC type for {user_func.__name__}")
 
-    def compile(self, funcs: dict[str, Callable[..., Any]]) -> tuple[dict[str, Callable[..., Any]], str]:
+    @staticmethod
+    def _stream_response_serializer(response_class: type[Any]) -> Callable[[Any], bytes]:
+        serialize = response_class.SerializeToString
+
+        def serializer(message: Any) -> bytes:
+            if type(message) is EncodedMessage:
+                return message.SerializeToString()
+            return serialize(message)  # type: ignore[no-any-return]
+
+        return serializer
+
+    def _build_file_proto(self, signatures: dict[str, RPCSignature]) -> None:
         service = self._create_service()
 
-        for func_name, func in funcs.items():
-            request_model, response_model, client_stream, server_stream = self._extract_pydantic_models(func)
-            self._create_message(request_model)
-            self._create_message(response_model)
-            self._add_rpc(service, func_name, request_model, response_model, client_stream, server_stream)
+        for func_name, signature in signatures.items():
+            self._create_message(signature.request_model)
+            self._create_message(signature.response_model)
+            self._add_rpc(
+                service,
+                func_name,
+                signature.request_model,
+                signature.response_model,
+                signature.client_stream,
+                signature.server_stream,
+            )
+
+    def _load_cached(self, funcs: dict[str, Callable[..., Any]]) -> CachedCompilation | None:
+        if self.cache is None:
+            return None
+        key = self.cache.make_key(self.app_package_name, self.service_name, funcs, self.method_options)
+        cached = self.cache.load(key)
+        if cached is not None:
+            logger.info("Loaded compiled descriptors for %s from cache", self.service_name)
+        return cached
+
+    @staticmethod
+    def _normalized_file_proto(file_proto: descriptor_pb2.FileDescriptorProto) -> descriptor_pb2.FileDescriptorProto:
+        pool = descriptor_pool.DescriptorPool()
+        normalized = descriptor_pb2.FileDescriptorProto()
+        pool.Add(file_proto)
+        pool.FindFileByName(file_proto.name).CopyToProto(normalized)
+        normalized.ClearField("syntax")
+        return normalized
+
+    def _import_generated_module(self) -> ModuleType | None:
+        if self.generated_package is None:
+            return None
+
+        module_name = f"{self.generated_package}.{self.app_package_name}_pb2"
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError as err:
+            raise FastGRPCCompilationError(
+                f"Generated module '{module_name}' not found. Run 'fastgrpcio compile' to generate it."
+            ) from err
+
+        generated_proto = descriptor_pb2.FileDescriptorProto()
+        module.DESCRIPTOR.CopyToProto(generated_proto)
+        generated_proto.ClearField("syntax")
+        if generated_proto != self._normalized_file_proto(self.file_proto):
+            raise FastGRPCCompilationError(
+                f"Generated module '{module_name}' does not match the registered handlers. "
+                "Run 'fastgrpcio compile' to regenerate it."
+            )
+
+        logger.info("Loaded generated module %s for %s", module_name, self.service_name)
+        return module
+
+    def render_proto(self) -> str:
+        field_type_names = descriptor_pb2.FieldDescriptorProto.Type
+        label_names = descriptor_pb2.FieldDescriptorProto.Label
+        lines = ['syntax = "proto2";', "", f"package {self.file_proto.package};", ""]
+
+        for message in self.file_proto.message_type:
+            lines.append(f"message {message.name} {{")
+            for field in message.field:
+                label = label_names.Name(field.label).removeprefix("LABEL_").lower()
+                if field.type == descriptor_pb2.FieldDescriptorProto.TYPE_MESSAGE:
+                    type_name = field.type_name
+                else:
+                    type_name = field_type_names.Name(field.type).removeprefix("TYPE_").lower()
+                lines.append(f"  {label} {type_name} {field.name} = {field.number};")
+            lines.extend(["}", ""])
+
+        for service in self.file_proto.service:
+            lines.append(f"service {service.name} {{")
+            for method in service.method:
+                request = f".{method.input_type.lstrip('.')}"
+                response = f".{method.output_type.lstrip('.')}"
+                if method.client_streaming:
+                    request = f"stream {request}"
+                if method.server_streaming:
+                    response = f"stream {response}"
+                lines.append(f"  rpc {method.name}({request}) returns ({response});")
+            lines.extend(["}", ""])
+
+        return "\n".join(lines)
+
+    @staticmethod
+    def _sample_data(model: type[BaseGRPCSchema], depth: int = 0) -> dict[str, Any]:
+        data: dict[str, Any] = {}
+        for field_name, field_type, is_repeated in model.iterate_by_model_fields():
+            if field_type in SAMPLE_VALUES:
+                value = SAMPLE_VALUES[field_type]
+            elif isinstance(field_type, type) and issubclass(field_type, BaseGRPCSchema) and depth < 4:
+                value = GRPCCompiler._sample_data(field_type, depth + 1)
+            else:
+                continue
+            data[field_name] = [value] if is_repeated else value
+        return data
+
+    def warmup(self) -> None:
+        for injected in self._injectors:
+            injected.build()
+        # Each method handles one populated request and response the way a call would, so
+        # validators, serializers and the message classes are all exercised before the first call.
+        for request_model, response_model, request_class, response_class in self._compiled_models:
+            try:
+                request = request_class(**self._sample_data(request_model))
+                request_model.model_validate(message_to_dict(request_class.FromString(request.SerializeToString())))
+                response = response_model.model_validate(self._sample_data(response_model))
+                build_response(response, response_class, None).SerializeToString()
+            except (ValidationError, TypeError, ValueError) as err:
+                logger.debug("Skipped warming up %s: %s", request_model.__name__, err)
+        logger.info("Warmed up %d methods of %s", len(self._compiled_models), self.service_name)
+
+    def _add_batch_variants(
+        self,
+        funcs: dict[str, Callable[..., Any]],
+        signatures: dict[str, RPCSignature],
+    ) -> dict[str, Callable[..., Any]]:
+        funcs = dict(funcs)
+        for func_name, func in list(funcs.items()):
+            method_options = self.method_options.get(func_name)
+            if method_options is None or not method_options.batch:
+                continue
 
-        self.pool.Add(self.file_proto)
+            signature = signatures[func_name]
+            if signature.client_stream or signature.server_stream or method_options.concurrency is not None:
+                raise ValueError(f"Function {func.__name__}: batch variants are only supported for unary handlers")
+
+            batch_name = f"{func_name}Batch"
+            if batch_name in funcs:
+                raise ValueError(f"Function with name '{batch_name}' is already registered.")
+
+            batch_func = make_batch_function(
+                self._inject(func),
+                signature.request_model,
+                signature.response_model,
+                batch_name,
+                method_options.batch_concurrency,
+            )
+            funcs[batch_name] = batch_func
+            signatures[batch_name] = self._extract_pydantic_models(batch_func)
+            self.method_options[batch_name] = MethodOptions(
+                min_deadline=method_options.min_deadline,
+                middlewares=method_options.middlewares,
+                priority=method_options.priority,
+            )
+            logger.info("Added batch variant %s for %s", batch_name, func_name)
+        return funcs
+
+    def compile(
+        self,
+        funcs: dict[str, Callable[..., Any]],
+        options: dict[str, MethodOptions] | None = None,
+    ) -> tuple[dict[str, Callable[..., Any]], str]:
+        self.method_options = dict(options or {})
+        if self.scheduler is not None:
+            for lane_options in self.method_options.values():
+                self.scheduler.lane(lane_options.priority)
+        user_funcs = funcs
+        cached = self._load_cached(funcs)
+        if cached is not None:
+            signatures = dict(cached.signatures)
+        else:
+            signatures = {func_name: self._extract_pydantic_models(func) for func_name, func in funcs.items()}
+        user_signatures = dict(signatures)
+        funcs = self._add_batch_variants(funcs, signatures)
+        for func_name, signature in signatures.items():
+            method_options = self.method_options.get(func_name)
+            if method_options is None or method_options.concurrency is None:
+                continue
+            if signature.client_stream or signature.server_stream:
+                raise ValueError(
+                    f"Function {funcs[func_name].__name__}: concurrency requires a per-message handler "
+                    "that takes a single request and returns a single response"
+                )
+            signatures[func_name] = signature._replace(client_stream=True, server_stream=True)
+        for func_name, func in funcs.items():
+            if signatures[func_name].server_stream and signatures[func_name].batched_requests:
+                raise ValueError(f"Function {func.__name__}: batched requests are only supported for client streaming")
+
+        if cached is not None:
+            self.file_proto.ParseFromString(cached.descriptor)
+            self.generated_messages.update(message.name for message in self.file_proto.message_type)
+        else:
+            self._build_file_proto(signatures)
+            if self.cache is not None:
+                key = self.cache.make_key(self.app_package_name, self.service_name, user_funcs, self.method_options)
+                self.cache.store(key, user_funcs, user_signatures, self.file_proto.SerializeToString())
+
+        generated_module = self._import_generated_module()
+        if generated_module is None:
+            if cached is not None:
+                # The cached bytes go to the pool as they are, without serializing file_proto again.
+                self.pool.AddSerializedFile(cached.descriptor)
+            else:
+                self.pool.Add(self.file_proto)
 
         for func_name, func in funcs.items():
-            request_model, response_model, client_stream, server_stream = self._extract_pydantic_models(func)
+            request_model, response_model, client_stream, server_stream, batched_requests = signatures[func_name]
             request_message = f"{self.file_proto.package}.{request_model.__name__}"
             response_message = f"{self.file_proto.package}.{response_model.__name__}"
 
-            request_class = GetMessageClass(self.pool.FindMessageTypeByName(request_message))
-            response_class = GetMessageClass(self.pool.FindMessageTypeByName(response_message))
+            if generated_module is not None:
+                request_class = getattr(generated_module, request_model.__name__)
+                response_class = getattr(generated_module, response_model.__name__)
+            else:
+                request_class = GetMessageClass(self.pool.FindMessageTypeByName(request_message))
+                response_class = GetMessageClass(self.pool.FindMessageTypeByName(response_message))
+            self._compiled_models.append((request_model, response_model, request_class, response_class))
 
-            handler = self._make_handler(func, request_model, response_class, func_name, client_stream, server_stream)
+            handler = self._make_handler(
+                func, request_model, response_class, func_name, client_stream, server_stream, batched_requests
+            )
 
             if client_stream and server_stream:
                 grpc_handler = grpc.stream_stream_rpc_method_handler(
@@ -222,7 +475,7 @@ class GRPCCompiler(CreateHandlersMixins):
                 grpc_handler = grpc.unary_stream_rpc_method_handler(
                     handler,
                     request_deserializer=request_class.FromString,
-                    response_serializer=response_class.SerializeToString,
+                    response_serializer=self._stream_response_serializer(response_class),
                 )
                 logger.info("Registered gRPC server streaming method: %s", func_name)
             else:
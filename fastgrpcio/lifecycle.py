@@ -0,0 +1,27 @@
+from typing import Literal
+
+ServerState = Literal["created", "starting", "serving", "draining", "stopped"]
+
+
+class InFlightTracker:
+    __slots__ = ("unary", "streams")
+
+    def __init__(self) -> None:
+        self.unary = 0
+        self.streams = 0
+
+    @property
+    def total(self) -> int:
+        return self.unary + self.streams
+
+    def start(self, streaming: bool) -> None:
+        if streaming:
+            self.streams += 1
+        else:
+            self.unary += 1
+
+    def finish(self, streaming: bool) -> None:
+        if streaming:
+            self.streams -= 1
+        else:
+            self.unary -= 1
@@ -0,0 +1,133 @@
+import os
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Literal
+
+from google.protobuf.message import Message
+
+from fastgrpcio.context import Context
+from fastgrpcio.lifecycle import InFlightTracker
+from fastgrpcio.middlewares import BaseMiddleware
+from fastgrpcio.schemas import BaseGRPCSchema
+
+LOAD_REPORT_METADATA_KEY = "endpoint-load-metrics"
+
+
+class LoadReport(BaseGRPCSchema):
+    cpu_utilization: float
+    in_flight: int
+    queue_depth: int
+
+
+class LoadReportRequest(BaseGRPCSchema):
+    interval: float | None = None
+
+
+class LoadReporter:
+    def __init__(
+        self,
+        inflight: InFlightTracker,
+        queue_depth: Callable[[], int] | None = None,
+        sample_interval: float = 1.0,
+    ) -> None:
+        self.inflight = inflight
+        self.queue_depth = queue_depth
+        self.sample_interval = sample_interval
+        self._cpu_count = os.cpu_count() or 1
+        self._last_wall = time.monotonic()
+        self._last_cpu = time.process_time()
+        self._cpu_utilization = 0.0
+
+    def cpu_utilization(self) -> float:
+        now = time.monotonic()
+        elapsed = now - self._last_wall
+        if elapsed >= self.sample_interval:
+            cpu = time.process_time()
+            self._cpu_utilization = min((cpu - self._last_cpu) / elapsed / self._cpu_count, 1.0)
+            self._last_wall = now
+            self._last_cpu = cpu
+        return self._cpu_utilization
+
+    def snapshot(self) -> LoadReport:
+        return LoadReport(
+            cpu_utilization=self.cpu_utilization(),
+            in_flight=self.inflight.total,
+            queue_depth=self.queue_depth() if self.queue_depth is not None else 0,
+        )
+
+    def header_value(self) -> str:
+        queue_depth = self.queue_depth() if self.queue_depth is not None else 0
+        return (
+            f"TEXT cpu_utilization={self.cpu_utilization():.4f},"
+            f"named_metrics.in_flight={self.inflight.total},"
+            f"named_metrics.queue_depth={queue_depth}"
+        )
+
+
+def parse_load_report(value: str) -> dict[str, float]:
+    _, _, payload = value.partition("TEXT ")
+    metrics: dict[str, float] = {}
+    for item in payload.split(","):
+        name, _, raw = item.strip().partition("=")
+        if not name or not raw:
+            continue
+        try:
+            metrics[name.removeprefix("named_metrics.")] = float(raw)
+        except ValueError:
+            continue
+    return metrics
+
+
+class LoadReportingMiddleware(BaseMiddleware):
+    def __init__(self, reporter: LoadReporter) -> None:
+        self.reporter = reporter
+
+    def _report(self, context: Context) -> None:
+        context.add_trailing_metadata((LOAD_REPORT_METADATA_KEY, self.reporter.header_value()))
+
+    async def handle_unary(
+        self,
+        request: Message,
+        context: Context,
+        call_next: Callable[[Any, Context], Awaitable[Any]],
+        user_func: Callable[..., Any],
+        request_model: type[BaseGRPCSchema],
+        response_class: type[BaseGRPCSchema],
+        handler: Callable[..., Any],
+        unary_type: Literal["Unary", "ServerStreaming", "ClientStreaming", "BidiStreaming"],
+        **kwargs: Any,
+    ) -> Any:
+        response = await call_next(request, context)
+        self._report(context)
+        return response
+
+    async def handle_stream(
+        self,
+        request: Message,
+        context: Context,
+        call_next: Callable[..., Any],
+        user_func: Callable[..., Any],
+        request_model: type[BaseGRPCSchema],
+        response_class: type[BaseGRPCSchema],
+        handler: Callable[..., Any],
+        unary_type: Literal["Unary", "ServerStreaming", "ClientStreaming", "BidiStreaming"],
+        **kwargs: Any,
+    ) -> AsyncIterator[Message]:
+        async for resp in call_next(request, context):
+            yield resp
+        self._report(context)
+
+    async def handle_client_stream(
+        self,
+        request: AsyncIterator[Message],
+        context: Context,
+        call_next: Callable[[Any, Context], Awaitable[Any]],
+        user_func: Callable[..., Any],
+        request_model: type[BaseGRPCSchema],
+        response_class: type[BaseGRPCSchema],
+        handler: Callable[..., Any],
+        unary_type: Literal["Unary", "ServerStreaming", "ClientStreaming", "BidiStreaming"],
+        **kwargs: Any,
+    ) -> Any:
+        response = await call_next(request, context)
+        self._report(context)
+        return response
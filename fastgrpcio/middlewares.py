@@ -1,16 +1,36 @@
 import logging
-from typing import Any, AsyncIterator, Awaitable, Callable, Literal
+from typing import Any, AsyncIterator, Awaitable, Callable, Collection, Literal
 
 import grpc
 from google.protobuf.message import Message
 
+from fastgrpcio.exceptions import FastGRPCMiddlewareError
 from fastgrpcio.schemas import BaseGRPCSchema
 
 logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S", level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+RPCType = Literal["Unary", "ServerStreaming", "ClientStreaming", "BidiStreaming"]
+
+RPC_TYPE_HOOKS: dict[RPCType, str] = {
+    "Unary": "handle_unary",
+    "ServerStreaming": "handle_stream",
+    "ClientStreaming": "handle_client_stream",
+    "BidiStreaming": "handle_stream",
+}
+
 
 class BaseMiddleware:
+    rpc_types: Collection[RPCType] | None = None
+
+    def applies_to(self, unary_type: RPCType) -> bool:
+        if self.rpc_types is not None and unary_type not in self.rpc_types:
+            return False
+        # The base hooks only pass calls through, so a middleware that doesn't override the
+        # hook for this kind of RPC is left out of the chain entirely.
+        hook = RPC_TYPE_HOOKS[unary_type]
+        return getattr(type(self), hook) is not getattr(BaseMiddleware, hook)
+
     async def handle_unary(
         self,
         request: Message,
@@ -61,6 +81,11 @@ class BaseMiddleware:
         return response
 
 
+def check_middleware(middleware: BaseMiddleware) -> None:
+    if not issubclass(type(middleware), BaseMiddleware):
+        raise FastGRPCMiddlewareError(f"Middleware should be instance of {BaseMiddleware.__name__}")
+
+
 class LoggingMiddleware(BaseMiddleware):
     async def handle_unary(
         self,
@@ -1,27 +1,113 @@
 import asyncio
 import logging
-from typing import Any, AsyncIterator, Callable, Literal
+from contextlib import AbstractAsyncContextManager, nullcontext
+from typing import Any, AsyncIterator, Awaitable, Callable, Literal
 
 import fast_depends
 import grpc
-from google.protobuf.json_format import MessageToDict
 from google.protobuf.message import Message
 from grpc._cython.cygrpc import _ServicerContext
-from pydantic import ValidationError
+from pydantic import TypeAdapter, ValidationError
 
 from fastgrpcio._utils import pydantic_error_to_grpc
-from fastgrpcio.context import GRPCContext, ContextWrapper
+from fastgrpcio.broadcast import Envelope
+from fastgrpcio.codec import EncodedMessage, message_to_dict
+from fastgrpcio.context import Context, ContextPool, reset_current_deadline, set_current_deadline
+from fastgrpcio.field_masks import build_response, resolve_field_mask
+from fastgrpcio.lifecycle import InFlightTracker
 from fastgrpcio.middlewares import BaseMiddleware
+from fastgrpcio.options import MethodOptions
+from fastgrpcio.scheduling import Scheduler
 from fastgrpcio.schemas import BaseGRPCSchema
+from fastgrpcio.streaming import batched, bounded_map, buffered
 
 logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S", level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+class LazyInjected:
+    __slots__ = ("func", "is_coroutine", "_injected")
+
+    def __init__(self, func: Callable[..., Any]) -> None:
+        self.func = func
+        self.is_coroutine = asyncio.iscoroutinefunction(func)
+        self._injected: Callable[..., Any] | None = None
+
+    def build(self) -> Callable[..., Any]:
+        # Building the dependency model is most of the cost of compiling a method, so it is
+        # deferred to the first call unless the app is warmed up before serving.
+        if self._injected is None:
+            self._injected = fast_depends.inject(self.func)
+        return self._injected
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        injected = self._injected
+        if injected is None:
+            injected = self.build()
+        return injected(*args, **kwargs)
+
+
 class CreateHandlersMixins:
     _middlewares: list[BaseMiddleware]
+    _injectors: list[LazyInjected]
     app_name: str
     app_package_name: str
+    context_pool: ContextPool | None
+    method_options: dict[str, MethodOptions]
+    inflight: InFlightTracker | None
+    scheduler: Scheduler | None
+
+    def _deadline_exceeded(self, context: Context, func_name: str) -> bool:
+        time_remaining = context.time_remaining()
+        if time_remaining is None:
+            return False
+        options = self.method_options.get(func_name)
+        min_deadline = options.min_deadline if options is not None and options.min_deadline is not None else 0.0
+        return time_remaining <= min_deadline
+
+    async def _reject_expired(self, context: Context, func_name: str) -> None:
+        logger.warning("[%s] - Rejected request: deadline exceeded before handler start", func_name)
+        try:
+            await context.abort(grpc.StatusCode.DEADLINE_EXCEEDED, "Deadline exceeded before the handler started")
+        finally:
+            # Rejection happens before the call's own try/finally, so the pooled context is returned here.
+            self._release_context(context)
+
+    def _inject(self, user_func: Callable[..., Any]) -> LazyInjected:
+        injected = LazyInjected(user_func)
+        self._injectors.append(injected)
+        return injected
+
+    def _acquire_context(self, context: _ServicerContext) -> Context:
+        if self.context_pool is not None:
+            return self.context_pool.acquire(context)
+        return Context(context)
+
+    def _release_context(self, context: Context) -> None:
+        if self.context_pool is not None:
+            self.context_pool.release(context)
+
+    def _track_start(self, streaming: bool) -> None:
+        if self.inflight is not None:
+            self.inflight.start(streaming)
+
+    def _track_finish(self, streaming: bool) -> None:
+        if self.inflight is not None:
+            self.inflight.finish(streaming)
+
+    def _scheduled(self, priority: str | None, context: Context) -> AbstractAsyncContextManager[None]:
+        if self.scheduler is None:
+            return nullcontext()
+        return self.scheduler.slot(priority, context)
+
+    def _method_middlewares(
+        self,
+        func_name: str,
+        unary_type: Literal["Unary", "ServerStreaming", "ClientStreaming", "BidiStreaming"],
+    ) -> list[BaseMiddleware]:
+        options = self.method_options.get(func_name)
+        method_middlewares = options.middlewares if options is not None else ()
+        return [mw for mw in (*self._middlewares, *method_middlewares) if mw.applies_to(unary_type)]
 
     def _apply_middlewares(
         self,
@@ -32,114 +118,145 @@ class CreateHandlersMixins:
         unary_type: Literal["Unary", "ServerStreaming", "ClientStreaming", "BidiStreaming"],
         func_name: str,
     ) -> Any:
-        if unary_type in ("Unary"):
+        # The chain only depends on the method, so it is built once here rather than per call. The
+        # wrappers return the middleware's awaitable or iterator as is, so each middleware adds one
+        # layer to a call instead of two.
+        middlewares = self._method_middlewares(func_name, unary_type)
+        options = self.method_options.get(func_name)
+        priority = options.priority if options is not None else None
 
-            async def _apply_unary(request: Any, context: _ServicerContext) -> Any:
-                context = ContextWrapper(context)
-                async def call_next(req: Any, ctx: grpc.aio.ServicerContext) -> Any:
-                    return await handler(req, ctx)
-
-                for mw in reversed(self._middlewares):
-                    prev_next = call_next
-
-                    async def wrapper(
-                        req: Any,
-                        ctx: grpc.aio.ServicerContext,
-                        mw: BaseMiddleware = mw,
-                        nxt: Callable[..., Any] = prev_next,
-                    ) -> Any:
-                        return await mw.handle_unary(
-                            request=req,
-                            context=ctx,
-                            call_next=nxt,
-                            user_func=user_func,
-                            request_model=request_model,
-                            response_class=response_class,
-                            handler=handler,
-                            unary_type=unary_type,
-                            app_name=self.app_name,
-                            app_package_name=self.app_package_name,
-                            func_name=func_name,
-                        )
-
-                    call_next = wrapper
-
-                return await call_next(request, context)
+        if unary_type in ("Unary"):
+            call_next: Callable[..., Any] = handler
+            for mw in reversed(middlewares):
+                prev_next = call_next
+
+                def wrapper(
+                    req: Any,
+                    ctx: grpc.aio.ServicerContext,
+                    mw: BaseMiddleware = mw,
+                    nxt: Callable[..., Any] = prev_next,
+                ) -> Awaitable[Any]:
+                    return mw.handle_unary(
+                        request=req,
+                        context=ctx,
+                        call_next=nxt,
+                        user_func=user_func,
+                        request_model=request_model,
+                        response_class=response_class,
+                        handler=handler,
+                        unary_type=unary_type,
+                        app_name=self.app_name,
+                        app_package_name=self.app_package_name,
+                        func_name=func_name,
+                    )
+
+                call_next = wrapper
+
+            async def _apply_unary(request: Any, grpc_context: _ServicerContext) -> Any:
+                context = self._acquire_context(grpc_context)
+                if self._deadline_exceeded(context, func_name):
+                    await self._reject_expired(context, func_name)
+                deadline_token = set_current_deadline(context.time_remaining())
+                self._track_start(False)
+                try:
+                    async with self._scheduled(priority, context):
+                        return await call_next(request, context)
+                finally:
+                    self._track_finish(False)
+                    reset_current_deadline(deadline_token)
+                    self._release_context(context)
 
             return _apply_unary
 
         elif unary_type in ("ServerStreaming", "BidiStreaming"):
-
-            async def _apply_server_stream(request: Any, context: _ServicerContext) -> AsyncIterator[Any]:
-                context = ContextWrapper(context)
-                async def call_next(req: Any, ctx: _ServicerContext) -> AsyncIterator[Any]:
-                    async for resp in handler(req, ctx):
-                        yield resp
-
-                for mw in reversed(self._middlewares):
-                    prev_next = call_next
-
-                    async def wrapper(
-                        req: Any,
-                        ctx: grpc.aio.ServicerContext,
-                        mw: BaseMiddleware = mw,
-                        nxt: Callable[..., Any] = prev_next,
-                    ) -> AsyncIterator[Any]:
-                        async for resp in mw.handle_stream(
-                            request=req,
-                            context=ctx,
-                            call_next=nxt,
-                            user_func=user_func,
-                            request_model=request_model,
-                            response_class=response_class,
-                            handler=handler,
-                            unary_type=unary_type,
-                            app_name=self.app_name,
-                            app_package_name=self.app_package_name,
-                            func_name=func_name,
-                        ):
+            prefetch = options.prefetch if options is not None else None
+
+            call_next = handler
+            for mw in reversed(middlewares):
+                prev_next = call_next
+
+                def stream_wrapper(
+                    req: Any,
+                    ctx: grpc.aio.ServicerContext,
+                    mw: BaseMiddleware = mw,
+                    nxt: Callable[..., Any] = prev_next,
+                ) -> AsyncIterator[Any]:
+                    return mw.handle_stream(
+                        request=req,
+                        context=ctx,
+                        call_next=nxt,
+                        user_func=user_func,
+                        request_model=request_model,
+                        response_class=response_class,
+                        handler=handler,
+                        unary_type=unary_type,
+                        app_name=self.app_name,
+                        app_package_name=self.app_package_name,
+                        func_name=func_name,
+                    )
+
+                call_next = stream_wrapper
+
+            async def _apply_server_stream(request: Any, grpc_context: _ServicerContext) -> AsyncIterator[Any]:
+                context = self._acquire_context(grpc_context)
+                if self._deadline_exceeded(context, func_name):
+                    await self._reject_expired(context, func_name)
+                deadline_token = set_current_deadline(context.time_remaining())
+                self._track_start(True)
+                try:
+                    async with self._scheduled(priority, context):
+                        stream = call_next(request, context)
+                        if prefetch is not None:
+                            stream = buffered(stream, prefetch)
+                        async for resp in stream:
                             yield resp
-
-                    call_next = wrapper
-
-                async for resp in call_next(request, context):
-                    yield resp
+                finally:
+                    self._track_finish(True)
+                    reset_current_deadline(deadline_token)
+                    self._release_context(context)
 
             return _apply_server_stream
 
         elif unary_type in ("ClientStreaming"):
-
-            async def _apply_client_stream(request: AsyncIterator[Any], context: _ServicerContext) -> Any:
-                context = ContextWrapper(context)
-                async def call_next(req_stream: AsyncIterator[Any], ctx: grpc.aio.ServicerContext) -> Any:
-                    return await handler(req_stream, ctx)
-
-                for mw in reversed(self._middlewares):
-                    prev_next = call_next
-
-                    async def wrapper(
-                        req_stream: AsyncIterator[Any],
-                        ctx: grpc.aio.ServicerContext,
-                        mw: BaseMiddleware = mw,
-                        nxt: Callable[..., Any] = prev_next,
-                    ) -> Any:
-                        return await mw.handle_client_stream(
-                            request=req_stream,
-                            context=ctx,
-                            call_next=nxt,
-                            user_func=user_func,
-                            request_model=request_model,
-                            response_class=response_class,
-                            handler=handler,
-                            unary_type=unary_type,
-                            app_name=self.app_name,
-                            app_package_name=self.app_package_name,
-                            func_name=func_name,
-                        )
-
-                    call_next = wrapper
-
-                return await call_next(request, context)
+            call_next = handler
+            for mw in reversed(middlewares):
+                prev_next = call_next
+
+                def client_stream_wrapper(
+                    req_stream: AsyncIterator[Any],
+                    ctx: grpc.aio.ServicerContext,
+                    mw: BaseMiddleware = mw,
+                    nxt: Callable[..., Any] = prev_next,
+                ) -> Awaitable[Any]:
+                    return mw.handle_client_stream(
+                        request=req_stream,
+                        context=ctx,
+                        call_next=nxt,
+                        user_func=user_func,
+                        request_model=request_model,
+                        response_class=response_class,
+                        handler=handler,
+                        unary_type=unary_type,
+                        app_name=self.app_name,
+                        app_package_name=self.app_package_name,
+                        func_name=func_name,
+                    )
+
+                call_next = client_stream_wrapper
+
+            async def _apply_client_stream(request: AsyncIterator[Any], grpc_context: _ServicerContext) -> Any:
+                context = self._acquire_context(grpc_context)
+                if self._deadline_exceeded(context, func_name):
+                    await self._reject_expired(context, func_name)
+                deadline_token = set_current_deadline(context.time_remaining())
+                self._track_start(True)
+                try:
+                    async with self._scheduled(priority, context):
+                        return await call_next(request, context)
+                finally:
+                    self._track_finish(True)
+                    reset_current_deadline(deadline_token)
+                    self._release_context(context)
 
             return _apply_client_stream
 
@@ -150,28 +267,25 @@ class CreateHandlersMixins:
         response_class: type[BaseGRPCSchema],
         func_name: str,
     ) -> Callable[..., Any]:
-        async def handler(request_proto: Message, context: ContextWrapper) -> Any:
-            request_dict: dict[str, Any] = MessageToDict(request_proto)
+        injected = self._inject(user_func)
+
+        async def handler(request_proto: Message, context: Context) -> Any:
+            request_dict: dict[str, Any] = message_to_dict(request_proto)
             try:
                 pydantic_request = request_model.model_validate(request_dict)
             except ValidationError as e:
                 grpc_status_obj = pydantic_error_to_grpc(e)
-                await context._context.abort_with_status(grpc_status_obj)
+                await context.abort_with_status(grpc_status_obj)
                 return
+            field_mask = await resolve_field_mask(context, response_class, request_proto)
 
-            injected = fast_depends.inject(user_func)
-
-            grpc_context = GRPCContext(context)
             result = (
-                await injected(pydantic_request, context=grpc_context)
-                if asyncio.iscoroutinefunction(injected)
-                else injected(pydantic_request, context=grpc_context)
+                await injected(pydantic_request, context=context)
+                if injected.is_coroutine
+                else injected(pydantic_request, context=context)
             )
 
-            if isinstance(result, response_class):
-                return result
-
-            return response_class(**result.model_dump())
+            return build_response(result, response_class, field_mask)
 
         handler = self._apply_middlewares(handler, user_func, request_model, response_class, unary_type="Unary", func_name=func_name)
         return handler
@@ -180,26 +294,40 @@ class CreateHandlersMixins:
         self,
         user_func: Callable[..., Any],
         request_model: type[BaseGRPCSchema],
-        response_class: type[BaseGRPCSchema],
+        response_class: type[Message],
         func_name: str,
     ) -> Callable[..., Any]:
-        async def handler(request_proto: Message, context: ContextWrapper) -> AsyncIterator[Any]:
-            request_dict: dict[str, Any] = MessageToDict(request_proto)
+        injected = self._inject(user_func)
+
+        async def handler(request_proto: Message, context: Context) -> AsyncIterator[Any]:
+            request_dict: dict[str, Any] = message_to_dict(request_proto)
             try:
                 pydantic_request = request_model.model_validate(request_dict)
             except ValidationError as e:
                 grpc_status_obj = pydantic_error_to_grpc(e)
-                await context._context.abort_with_status(grpc_status_obj)
+                await context.abort_with_status(grpc_status_obj)
                 return
+            field_mask = await resolve_field_mask(context, response_class, request_proto)
 
-            injected = fast_depends.inject(user_func)
-            grpc_context = GRPCContext(context)
-            result = injected(pydantic_request, context=grpc_context)
+            result = injected(pydantic_request, context=context)
             if asyncio.iscoroutine(result):
                 result = await result
 
             async for item in result:
-                yield response_class(**item.model_dump())
+                # Pre-encoded items skip serialization unless a mask asks for less than they hold. They are
+                # wrapped rather than yielded as bytes, so middlewares still see something message-like.
+                if isinstance(item, bytes):
+                    if field_mask is None:
+                        yield EncodedMessage(item, response_class)
+                    else:
+                        yield build_response(response_class.FromString(item), response_class, field_mask)
+                elif isinstance(item, Envelope):
+                    if field_mask is None:
+                        yield EncodedMessage(item.encode(response_class), response_class)
+                    else:
+                        yield build_response(item.event, response_class, field_mask)
+                else:
+                    yield build_response(item, response_class, field_mask)
 
         handler = self._apply_middlewares(
             handler, user_func, request_model, response_class, unary_type="ServerStreaming", func_name=func_name
@@ -213,28 +341,63 @@ class CreateHandlersMixins:
         response_class: type[BaseGRPCSchema],
         func_name: str,
     ) -> Callable[..., Any]:
-        async def handler(request_iterator: AsyncIterator[Message], context: ContextWrapper) -> Any:
+        injected = self._inject(user_func)
+
+        async def handler(request_iterator: AsyncIterator[Message], context: Context) -> Any:
             async def pydantic_request_gen() -> AsyncIterator[Any]:
                 async for msg in request_iterator:
-                    msg_dict: dict[str, Any] = MessageToDict(msg)
+                    msg_dict: dict[str, Any] = message_to_dict(msg)
                     try:
                         yield request_model.model_validate(msg_dict)
                     except ValidationError as e:
                         grpc_status_obj = pydantic_error_to_grpc(e)
-                        await context._context.abort_with_status(grpc_status_obj)
+                        await context.abort_with_status(grpc_status_obj)
                         return
 
-            injected = fast_depends.inject(user_func)
-            grpc_context = GRPCContext(context)
+            field_mask = await resolve_field_mask(context, response_class)
             result = (
-                await injected(pydantic_request_gen(), context=grpc_context)
-                if asyncio.iscoroutinefunction(user_func)
-                else injected(pydantic_request_gen(), context=grpc_context)
+                await injected(pydantic_request_gen(), context=context)
+                if injected.is_coroutine
+                else injected(pydantic_request_gen(), context=context)
             )
 
-            if isinstance(result, response_class):
-                return result
-            return response_class(**result.model_dump())
+            return build_response(result, response_class, field_mask)
+
+        handler = self._apply_middlewares(
+            handler, user_func, request_model, response_class, unary_type="ClientStreaming", func_name=func_name
+        )
+        return handler
+
+    def _make_batched_client_stream_handler(
+        self,
+        user_func: Callable[..., Any],
+        request_model: type[BaseGRPCSchema],
+        response_class: type[BaseGRPCSchema],
+        func_name: str,
+        batch_size: int,
+        batch_linger: float,
+    ) -> Callable[..., Any]:
+        injected = self._inject(user_func)
+        batch_adapter: TypeAdapter[list[BaseGRPCSchema]] = TypeAdapter(list[request_model])  # type: ignore[valid-type]
+
+        async def handler(request_iterator: AsyncIterator[Message], context: Context) -> Any:
+            async def pydantic_batch_gen() -> AsyncIterator[list[Any]]:
+                async for messages in batched(request_iterator, batch_size, batch_linger):
+                    try:
+                        yield batch_adapter.validate_python([message_to_dict(msg) for msg in messages])
+                    except ValidationError as e:
+                        grpc_status_obj = pydantic_error_to_grpc(e)
+                        await context.abort_with_status(grpc_status_obj)
+                        return
+
+            field_mask = await resolve_field_mask(context, response_class)
+            result = (
+                await injected(pydantic_batch_gen(), context=context)
+                if injected.is_coroutine
+                else injected(pydantic_batch_gen(), context=context)
+            )
+
+            return build_response(result, response_class, field_mask)
 
         handler = self._apply_middlewares(
             handler, user_func, request_model, response_class, unary_type="ClientStreaming", func_name=func_name
@@ -248,26 +411,63 @@ class CreateHandlersMixins:
         response_class: type[BaseGRPCSchema],
         func_name: str,
     ) -> Callable[..., Any]:
-        async def handler(request_iterator: AsyncIterator[Message], context: ContextWrapper) -> AsyncIterator[Any]:
+        injected = self._inject(user_func)
+
+        async def handler(request_iterator: AsyncIterator[Message], context: Context) -> AsyncIterator[Any]:
             async def pydantic_request_gen() -> AsyncIterator[Any]:
                 async for msg in request_iterator:
-                    msg_dict: dict[str, Any] = MessageToDict(msg)
+                    msg_dict: dict[str, Any] = message_to_dict(msg)
                     try:
                         yield request_model.model_validate(msg_dict)
                     except ValidationError as e:
                         grpc_status_obj = pydantic_error_to_grpc(e)
-                        await context._context.abort_with_status(grpc_status_obj)
+                        await context.abort_with_status(grpc_status_obj)
                         return
 
-            injected = fast_depends.inject(user_func)
-            grpc_context = GRPCContext(context)
-
-            result = injected(pydantic_request_gen(), context=grpc_context)
+            field_mask = await resolve_field_mask(context, response_class)
+            result = injected(pydantic_request_gen(), context=context)
             if asyncio.iscoroutine(result):
                 result = await result
 
             async for resp in result:
-                yield response_class(**resp.model_dump())
+                yield build_response(resp, response_class, field_mask)
+
+        handler = self._apply_middlewares(handler, user_func, request_model, response_class, unary_type="BidiStreaming", func_name=func_name)
+        return handler
+
+    def _make_concurrent_stream_handler(
+        self,
+        user_func: Callable[..., Any],
+        request_model: type[BaseGRPCSchema],
+        response_class: type[BaseGRPCSchema],
+        func_name: str,
+        concurrency: int,
+        ordered: bool,
+    ) -> Callable[..., Any]:
+        injected = self._inject(user_func)
+        is_coroutine = injected.is_coroutine
+
+        async def handler(request_iterator: AsyncIterator[Message], context: Context) -> AsyncIterator[Any]:
+            async def process(msg: Message) -> Any:
+                msg_dict: dict[str, Any] = message_to_dict(msg)
+                try:
+                    pydantic_request = request_model.model_validate(msg_dict)
+                except ValidationError as e:
+                    grpc_status_obj = pydantic_error_to_grpc(e)
+                    await context.abort_with_status(grpc_status_obj)
+                    return
+
+                result = (
+                    await injected(pydantic_request, context=context)
+                    if is_coroutine
+                    else injected(pydantic_request, context=context)
+                )
+
+                return build_response(result, response_class, field_mask)
+
+            field_mask = await resolve_field_mask(context, response_class)
+            async for resp in bounded_map(request_iterator, process, concurrency, ordered):
+                yield resp
 
         handler = self._apply_middlewares(handler, user_func, request_model, response_class, unary_type="BidiStreaming", func_name=func_name)
         return handler
@@ -0,0 +1,31 @@
+from dataclasses import dataclass
+
+from fastgrpcio.middlewares import BaseMiddleware, check_middleware
+
+
+@dataclass(slots=True)
+class MethodOptions:
+    min_deadline: float | None = None
+    concurrency: int | None = None
+    ordered: bool = True
+    prefetch: int | None = None
+    batch_size: int = 100
+    batch_linger: float = 0.05
+    batch: bool = False
+    batch_concurrency: int = 16
+    middlewares: tuple[BaseMiddleware, ...] = ()
+    priority: str | None = None
+
+    def __post_init__(self) -> None:
+        if self.concurrency is not None and self.concurrency < 1:
+            raise ValueError("concurrency must be a positive integer")
+        if self.prefetch is not None and self.prefetch < 1:
+            raise ValueError("prefetch must be a positive integer")
+        if self.batch_size < 1:
+            raise ValueError("batch_size must be a positive integer")
+        if self.batch_linger < 0:
+            raise ValueError("batch_linger must not be negative")
+        if self.batch_concurrency < 1:
+            raise ValueError("batch_concurrency must be a positive integer")
+        for middleware in self.middlewares:
+            check_middleware(middleware)
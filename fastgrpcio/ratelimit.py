@@ -0,0 +1,201 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, AsyncIterator, Awaitable, Callable, Literal
+
+import grpc
+from google.protobuf.message import Message
+
+from fastgrpcio.context import Context
+from fastgrpcio.middlewares import BaseMiddleware
+from fastgrpcio.schemas import BaseGRPCSchema
+
+logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S", level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RETRY_AFTER_METADATA_KEY = "retry-after"
+
+EVICTION_PROBES = 8
+
+
+class TokenBucketStore:
+    __slots__ = ("rate", "burst", "_buckets", "_shards", "_mask", "_shard_size")
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 65536, shards: int = 16) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if shards < 1 or shards & (shards - 1):
+            raise ValueError("shards must be a power of two")
+        self.rate = rate
+        self.burst = burst
+        # Each bucket is a plain [tokens, updated_at] list mutated in place on the event loop. Hits
+        # only look it up in _buckets; the shards record insertion order for eviction, so new keys
+        # only ever scan one small map.
+        self._buckets: dict[str, list[float]] = {}
+        self._shards: list[OrderedDict[str, list[float]]] = [OrderedDict() for _ in range(shards)]
+        self._mask = shards - 1
+        self._shard_size = max(max_keys // shards, 1)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _insert(self, key: str, now: float) -> list[float]:
+        shard = self._shards[hash(key) & self._mask]
+        if len(shard) >= self._shard_size:
+            # Hits don't reorder a shard, so its oldest entries are the keys seen first. A bucket
+            # that has refilled can be dropped without losing anything; busy ones go to the back,
+            # and if all probed buckets are busy the fullest of them is dropped.
+            evicted, fullest = "", -1.0
+            for _ in range(min(EVICTION_PROBES, len(shard))):
+                old_key, old_bucket = shard.popitem(last=False)
+                tokens = old_bucket[0] + (now - old_bucket[1]) * self.rate
+                if tokens >= self.burst:
+                    evicted = old_key
+                    break
+                shard[old_key] = old_bucket
+                if tokens > fullest:
+                    evicted, fullest = old_key, tokens
+            else:
+                del shard[evicted]
+            del self._buckets[evicted]
+        bucket = shard[key] = self._buckets[key] = [self.burst, now]
+        return bucket
+
+    def take(self, key: str, cost: float = 1.0, now: float | None = None) -> float:
+        if now is None:
+            now = monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._insert(key, now)
+            tokens = bucket[0]
+        else:
+            tokens = bucket[0] + (now - bucket[1]) * self.rate
+            if tokens > self.burst:
+                tokens = self.burst
+            bucket[1] = now
+
+        if tokens >= cost:
+            bucket[0] = tokens - cost
+            return 0.0
+        bucket[0] = tokens
+        return (cost - tokens) / self.rate
+
+
+class RateLimitMiddleware(BaseMiddleware):
+    def __init__(
+        self,
+        rate: float,
+        burst: int | None = None,
+        *,
+        key: str | None = None,
+        message_rate: float | None = None,
+        message_burst: int | None = None,
+        max_keys: int = 65536,
+        shards: int = 16,
+    ) -> None:
+        self.key = key.lower() if key is not None else None
+        self.max_keys = max_keys
+        self._peer_keys: dict[str, str] = {}
+        self.calls = TokenBucketStore(rate, float(burst or max(int(rate), 1)), max_keys, shards)
+        self.messages = (
+            TokenBucketStore(message_rate, float(message_burst or max(int(message_rate), 1)), max_keys, shards)
+            if message_rate is not None
+            else None
+        )
+
+    def _key(self, context: Context) -> str:
+        if self.key is not None:
+            # Scanning the raw metadata avoids parsing all of it into dicts just to read one entry.
+            for name, value in context.invocation_metadata() or ():
+                if name == self.key:
+                    return value  # type: ignore[no-any-return]
+        peer = context.peer
+        key = self._peer_keys.get(peer)
+        if key is None:
+            if len(self._peer_keys) >= self.max_keys:
+                self._peer_keys.clear()
+            # Peers look like "ipv4:10.0.0.1:53422"; drop the port so every connection from the
+            # same host shares a bucket.
+            key = self._peer_keys[peer] = peer.rpartition(":")[0] or peer
+        return key
+
+    async def _reject(self, context: Context, key: str, retry_after: float) -> Any:
+        logger.debug("Rate limited %s, retry after %.3fs", key, retry_after)
+        await context.abort(
+            grpc.StatusCode.RESOURCE_EXHAUSTED,
+            "Rate limit exceeded",
+            trailing_metadata=((RETRY_AFTER_METADATA_KEY, f"{retry_after:.3f}"),),
+        )
+
+    @staticmethod
+    async def _throttle(request: AsyncIterator[Any], messages: TokenBucketStore, key: str) -> AsyncIterator[Any]:
+        async for message in request:
+            # Holding back the next read lets flow control slow the sender down instead of
+            # failing a stream that is already half done.
+            retry_after = messages.take(key)
+            while retry_after:
+                await asyncio.sleep(retry_after)
+                retry_after = messages.take(key)
+            yield message
+
+    def handle_unary(  # type: ignore[override]
+        self,
+        request: Message,
+        context: Context,
+        call_next: Callable[[Any, Context], Awaitable[Any]],
+        user_func: Callable[..., Any],
+        request_model: type[BaseGRPCSchema],
+        response_class: type[BaseGRPCSchema],
+        handler: Callable[..., Any],
+        unary_type: Literal["Unary", "ServerStreaming", "ClientStreaming", "BidiStreaming"],
+        **kwargs: Any,
+    ) -> Awaitable[Any]:
+        key = self._key(context)
+        retry_after = self.calls.take(key)
+        if retry_after:
+            return self._reject(context, key, retry_after)
+        # Handing back the next awaitable instead of awaiting it here keeps admitted calls from
+        # paying for an extra coroutine.
+        return call_next(request, context)
+
+    async def handle_stream(
+        self,
+        request: Message,
+        context: Context,
+        call_next: Callable[..., Any],
+        user_func: Callable[..., Any],
+        request_model: type[BaseGRPCSchema],
+        response_class: type[BaseGRPCSchema],
+        handler: Callable[..., Any],
+        unary_type: Literal["Unary", "ServerStreaming", "ClientStreaming", "BidiStreaming"],
+        **kwargs: Any,
+    ) -> AsyncIterator[Message]:
+        key = self._key(context)
+        retry_after = self.calls.take(key)
+        if retry_after:
+            await self._reject(context, key, retry_after)
+        if unary_type == "BidiStreaming" and self.messages is not None:
+            request = self._throttle(request, self.messages, key)
+        async for resp in call_next(request, context):
+            yield resp
+
+    def handle_client_stream(  # type: ignore[override]
+        self,
+        request: AsyncIterator[Message],
+        context: Context,
+        call_next: Callable[[Any, Context], Awaitable[Any]],
+        user_func: Callable[..., Any],
+        request_model: type[BaseGRPCSchema],
+        response_class: type[BaseGRPCSchema],
+        handler: Callable[..., Any],
+        unary_type: Literal["Unary", "ServerStreaming", "ClientStreaming", "BidiStreaming"],
+        **kwargs: Any,
+    ) -> Awaitable[Any]:
+        key = self._key(context)
+        retry_after = self.calls.take(key)
+        if retry_after:
+            return self._reject(context, key, retry_after)
+        if self.messages is not None:
+            request = self._throttle(request, self.messages, key)
+        return call_next(request, context)
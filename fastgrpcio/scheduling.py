@@ -0,0 +1,143 @@
+import asyncio
+import heapq
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Mapping
+
+import grpc
+
+from fastgrpcio.context import Context
+
+logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S", level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TENANT_METADATA_KEY = "x-tenant-id"
+
+DEFAULT_PRIORITY_CLASSES: dict[str, int | None] = {
+    "critical": None,
+    "default": 64,
+    "bulk": 8,
+}
+
+
+class PriorityLane:
+    __slots__ = ("name", "budget", "running", "waiting", "virtual_time", "_heap", "_finish_tags", "_seq")
+
+    def __init__(self, name: str, budget: int | None) -> None:
+        self.name = name
+        self.budget = budget
+        self.running = 0
+        self.waiting = 0
+        self.virtual_time = 0.0
+        self._heap: list[tuple[float, int, float, str, asyncio.Future[None]]] = []
+        self._finish_tags: dict[str, float] = {}
+        self._seq = 0
+
+    def try_acquire(self) -> bool:
+        if self.budget is None or (self.running < self.budget and not self.waiting):
+            self.running += 1
+            return True
+        return False
+
+    def enqueue(self, tenant: str, weight: float) -> asyncio.Future[None]:
+        # Weighted fair queuing: each tenant's requests are stamped with virtual finish times
+        # that advance by 1/weight, so a tenant with a deep backlog only delays its own requests.
+        start = max(self.virtual_time, self._finish_tags.get(tenant, 0.0))
+        finish = start + 1.0 / weight
+        self._finish_tags[tenant] = finish
+        self._seq += 1
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (finish, self._seq, start, tenant, future))
+        self.waiting += 1
+        return future
+
+    def abandon(self, future: asyncio.Future[None]) -> None:
+        if future.done() and not future.cancelled():
+            self.release()
+            return
+        future.cancel()
+        self.waiting -= 1
+        if not self.waiting:
+            self._reset_tags()
+
+    def release(self) -> None:
+        self.running -= 1
+        while self._heap:
+            finish, _, start, tenant, future = heapq.heappop(self._heap)
+            if future.done():
+                continue
+            self.waiting -= 1
+            self.running += 1
+            self.virtual_time = start
+            if self._finish_tags.get(tenant) == finish:
+                del self._finish_tags[tenant]
+            future.set_result(None)
+            break
+        if not self.waiting:
+            self._reset_tags()
+
+    def _reset_tags(self) -> None:
+        self._heap.clear()
+        self._finish_tags.clear()
+        self.virtual_time = 0.0
+
+
+class Scheduler:
+    def __init__(
+        self,
+        classes: Mapping[str, int | None] | None = None,
+        *,
+        default_class: str = "default",
+        tenant_metadata_key: str = TENANT_METADATA_KEY,
+        tenant_weights: Mapping[str, float] | None = None,
+        max_queue_size: int = 1024,
+    ) -> None:
+        classes = dict(classes) if classes is not None else dict(DEFAULT_PRIORITY_CLASSES)
+        if default_class not in classes:
+            raise ValueError(f"Default priority class '{default_class}' is not one of {sorted(classes)}")
+        for name, budget in classes.items():
+            if budget is not None and budget < 1:
+                raise ValueError(f"Concurrency budget of priority class '{name}' must be a positive integer")
+
+        self.lanes = {name: PriorityLane(name, budget) for name, budget in classes.items()}
+        self.default_class = default_class
+        self.tenant_metadata_key = tenant_metadata_key
+        self.tenant_weights = dict(tenant_weights or {})
+        self.max_queue_size = max_queue_size
+
+    def queue_depth(self) -> int:
+        return sum(lane.waiting for lane in self.lanes.values())
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {name: {"running": lane.running, "waiting": lane.waiting} for name, lane in self.lanes.items()}
+
+    def lane(self, priority: str | None) -> PriorityLane:
+        name = priority or self.default_class
+        lane = self.lanes.get(name)
+        if lane is None:
+            raise ValueError(f"Unknown priority class '{name}', expected one of {sorted(self.lanes)}")
+        return lane
+
+    @asynccontextmanager
+    async def slot(self, priority: str | None, context: Context) -> AsyncIterator[None]:
+        lane = self.lane(priority)
+        if not lane.try_acquire():
+            if lane.waiting >= self.max_queue_size:
+                logger.warning("Rejected request: %s queue is full", lane.name)
+                await context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, f"Server is busy ({lane.name} queue is full)")
+
+            tenant = context.metadata.get(self.tenant_metadata_key, "")
+            future = lane.enqueue(tenant, self.tenant_weights.get(tenant, 1.0))
+            try:
+                await asyncio.wait_for(future, context.time_remaining())
+            except asyncio.TimeoutError:
+                lane.abandon(future)
+                await context.abort(grpc.StatusCode.DEADLINE_EXCEEDED, "Deadline exceeded while queued")
+            except BaseException:
+                lane.abandon(future)
+                raise
+
+        try:
+            yield
+        finally:
+            lane.release()
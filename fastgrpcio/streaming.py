@@ -0,0 +1,131 @@
+import asyncio
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+async def bounded_map(
+    source: AsyncIterator[T],
+    func: Callable[[T], Awaitable[R]],
+    concurrency: int,
+    ordered: bool = True,
+) -> AsyncIterator[R]:
+    source_iter = source.__aiter__()
+    running: set[asyncio.Future[R]] = set()
+    window: deque[asyncio.Future[R]] = deque()
+    reader: asyncio.Future[T] | None = None
+    exhausted = False
+
+    try:
+        while True:
+            if ordered:
+                while window and window[0].done():
+                    yield window.popleft().result()
+
+            # The next message is only read once a slot frees up, so the transport stops
+            # acknowledging data and flow control pushes back on the sender.
+            in_window = len(window) if ordered else len(running)
+            if reader is None and not exhausted and in_window < concurrency:
+                reader = asyncio.ensure_future(anext(source_iter))
+
+            waiting: set[asyncio.Future[Any]] = set(running)
+            if reader is not None:
+                waiting.add(reader)
+            if not waiting:
+                break
+
+            done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+
+            if reader is not None and reader in done:
+                done.discard(reader)
+                try:
+                    item = reader.result()
+                except StopAsyncIteration:
+                    exhausted = True
+                else:
+                    task = asyncio.ensure_future(func(item))
+                    running.add(task)
+                    if ordered:
+                        window.append(task)
+                reader = None
+
+            for finished in done:
+                running.discard(finished)
+                result: R = finished.result()
+                if not ordered:
+                    yield result
+    finally:
+        pending: list[asyncio.Future[Any]] = [*running, reader] if reader is not None else list(running)
+        for future in pending:
+            future.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def buffered(source: AsyncIterator[T], size: int) -> AsyncIterator[T]:
+    queue: asyncio.Queue[T] = asyncio.Queue(maxsize=size)
+
+    async def produce() -> None:
+        async for item in source:
+            await queue.put(item)
+
+    producer = asyncio.ensure_future(produce())
+    try:
+        while True:
+            if not queue.empty():
+                yield queue.get_nowait()
+                continue
+            if producer.done():
+                producer.result()
+                return
+
+            getter = asyncio.ensure_future(queue.get())
+            await asyncio.wait((getter, producer), return_when=asyncio.FIRST_COMPLETED)
+            if getter.done():
+                yield getter.result()
+            else:
+                getter.cancel()
+    finally:
+        producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
+
+
+async def batched(source: AsyncIterator[T], size: int, linger: float) -> AsyncIterator[list[T]]:
+    loop = asyncio.get_running_loop()
+    source_iter = source.__aiter__()
+    reader: asyncio.Future[T] | None = None
+    batch: list[T] = []
+    flush_at = 0.0
+
+    try:
+        while True:
+            if reader is None:
+                reader = asyncio.ensure_future(anext(source_iter))
+            timeout = max(flush_at - loop.time(), 0.0) if batch else None
+            done, _ = await asyncio.wait((reader,), timeout=timeout)
+            if not done:
+                yield batch
+                batch = []
+                continue
+
+            try:
+                item = reader.result()
+            except StopAsyncIteration:
+                if batch:
+                    yield batch
+                return
+            finally:
+                reader = None
+
+            if not batch:
+                flush_at = loop.time() + linger
+            batch.append(item)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+    finally:
+        if reader is not None:
+            reader.cancel()
+            await asyncio.gather(reader, return_exceptions=True)
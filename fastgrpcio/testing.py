@@ -0,0 +1,354 @@
+import asyncio
+import time
+import weakref
+from contextlib import nullcontext
+from types import TracebackType
+from typing import Any, AsyncGenerator, AsyncIterator, Callable, Literal, Sequence, TypeAlias
+
+import grpc
+from google.protobuf import descriptor_pool
+from google.protobuf.json_format import MessageToDict, ParseDict
+from google.protobuf.message import Message
+from google.protobuf.message_factory import GetMessageClass
+from grpc.aio._typing import MetadataType
+
+from fastgrpcio.codec import message_to_dict
+from fastgrpcio.fast_grpc import FastGRPC
+from fastgrpcio.field_masks import FIELD_MASK_METADATA_KEY
+from fastgrpcio.schemas import BaseGRPCSchema
+
+TestResponseFormat = Literal["dict", "proto", "model"]
+TestRequestBody: TypeAlias = dict[str, Any] | Message | BaseGRPCSchema
+TestMethod: TypeAlias = tuple[grpc.RpcMethodHandler, type[Message], type[Message]]
+
+
+class FakeServicerContext:
+    def __init__(
+        self,
+        metadata: MetadataType = (),
+        timeout: float | None = None,
+        peer: str = "ipv4:127.0.0.1:0",
+    ) -> None:
+        self._metadata = tuple(metadata)
+        self._deadline = time.monotonic() + timeout if timeout is not None else None
+        self._peer = peer
+        self._trailing_metadata: tuple[tuple[str, str | bytes], ...] = ()
+        self.code: grpc.StatusCode = grpc.StatusCode.OK
+        self.details: str | None = None
+
+    def invocation_metadata(self) -> MetadataType:
+        return self._metadata
+
+    def peer(self) -> str:
+        return self._peer
+
+    def time_remaining(self) -> float | None:
+        if self._deadline is None:
+            return None
+        return max(self._deadline - time.monotonic(), 0.0)
+
+    def trailing_metadata(self) -> MetadataType:
+        return self._trailing_metadata
+
+    def set_trailing_metadata(self, trailing_metadata: MetadataType) -> None:
+        self._trailing_metadata = tuple(trailing_metadata)
+
+    def set_code(self, code: grpc.StatusCode) -> None:
+        self.code = code
+
+    def set_details(self, details: str) -> None:
+        self.details = details
+
+    async def abort(self, code: grpc.StatusCode, details: str = "", trailing_metadata: MetadataType = ()) -> None:
+        self.code = code
+        self.details = details
+        if trailing_metadata:
+            self._trailing_metadata = tuple(trailing_metadata)
+        raise grpc.aio.AbortError()
+
+    async def abort_with_status(self, status: grpc.Status) -> None:
+        await self.abort(status.code, status.details, status.trailing_metadata)
+
+    def rpc_error(self) -> grpc.aio.AioRpcError:
+        return grpc.aio.AioRpcError(
+            self.code,
+            grpc.aio.Metadata(),
+            grpc.aio.Metadata(*self._trailing_metadata),
+            details=self.details,
+        )
+
+
+class TestStreamCall:
+    __test__ = False
+
+    def __init__(self, context: FakeServicerContext, responses: AsyncGenerator[Any, None]) -> None:
+        self.context = context
+        self._responses = responses
+
+    def __aiter__(self) -> AsyncIterator[Any]:
+        return self._responses
+
+    async def __aenter__(self) -> "TestStreamCall":
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        await self.aclose()
+
+    def trailing_metadata(self) -> MetadataType:
+        return self.context.trailing_metadata()
+
+    async def aclose(self) -> None:
+        # Breaking out of "async for" leaves the stream open; closing it runs the handler's cleanup.
+        await self._responses.aclose()
+
+
+class TestClient:
+    __test__ = False
+
+    def __init__(
+        self,
+        app: FastGRPC,
+        *,
+        response_format: TestResponseFormat = "dict",
+        run_lifespan: bool = True,
+    ) -> None:
+        self.app = app
+        self.response_format = response_format
+        self.run_lifespan = run_lifespan
+        self._handlers: dict[str, grpc.RpcMethodHandler] = {}
+        self._methods: dict[str, TestMethod] = {}
+        self._streams: weakref.WeakSet[TestStreamCall] = weakref.WeakSet()
+        self._lifespan: Any = None
+        for handlers, service_name, _ in app.compile_services():
+            for method_name, handler in handlers.items():
+                self._handlers[f"{service_name}/{method_name}"] = handler
+
+    async def __aenter__(self) -> "TestClient":
+        if self.run_lifespan and self.app.lifespan is not None:
+            self._lifespan = self.app.lifespan(self.app)
+        else:
+            self._lifespan = nullcontext()
+        await self._lifespan.__aenter__()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        for call in list(self._streams):
+            await call.aclose()
+        await self._lifespan.__aexit__(exc_type, exc_val, exc_tb)
+
+    def _method(self, service_name: str, method_name: str) -> TestMethod:
+        method_path = f"{service_name}/{method_name}"
+        method = self._methods.get(method_path)
+        if method is not None:
+            return method
+
+        handler = self._handlers.get(method_path)
+        if handler is None:
+            raise grpc.aio.AioRpcError(
+                grpc.StatusCode.UNIMPLEMENTED,
+                grpc.aio.Metadata(),
+                grpc.aio.Metadata(),
+                details=f"Method not found: {service_name}/{method_name}",
+            )
+        pool = descriptor_pool.Default()
+        method_desc = pool.FindServiceByName(service_name).FindMethodByName(method_name)
+        request_cls = GetMessageClass(pool.FindMessageTypeByName(method_desc.input_type.full_name))
+        response_cls = GetMessageClass(pool.FindMessageTypeByName(method_desc.output_type.full_name))
+        method = self._methods[method_path] = (handler, request_cls, response_cls)
+        return method
+
+    @staticmethod
+    def _with_field_mask(metadata: MetadataType, fields: Sequence[str] | None) -> MetadataType:
+        if not fields:
+            return metadata
+        return (*metadata, (FIELD_MASK_METADATA_KEY, ",".join(fields)))
+
+    @staticmethod
+    def _encode_request(handler: grpc.RpcMethodHandler, request_cls: type[Message], body: TestRequestBody) -> Any:
+        # Requests take the same round trip through bytes as they would on the wire.
+        if isinstance(body, BaseGRPCSchema):
+            message = request_cls(**body.model_dump())
+        elif isinstance(body, Message):
+            message = body
+        else:
+            message = request_cls()
+            ParseDict(body, message)
+        return handler.request_deserializer(message.SerializeToString())
+
+    def _decode_response(
+        self,
+        handler: grpc.RpcMethodHandler,
+        response_cls: type[Message],
+        response: Any,
+        response_model: type[BaseGRPCSchema] | None,
+        response_format: TestResponseFormat | None,
+    ) -> Any:
+        message = response_cls.FromString(handler.response_serializer(response))
+        if response_model is not None:
+            return response_model.model_validate(message_to_dict(message))
+        response_format = response_format or self.response_format
+        if response_format == "proto":
+            return message
+        if response_format == "model":
+            raise ValueError("response_format='model' requires response_model")
+        return MessageToDict(message, preserving_proto_field_name=True)
+
+    async def _request_stream(
+        self,
+        handler: grpc.RpcMethodHandler,
+        request_cls: type[Message],
+        body_stream: AsyncIterator[TestRequestBody],
+    ) -> AsyncIterator[Any]:
+        async for item in body_stream:
+            yield self._encode_request(handler, request_cls, item)
+
+    async def _call(self, context: FakeServicerContext, call: Any, timeout: float | None) -> Any:
+        try:
+            return await asyncio.wait_for(call, timeout)
+        except asyncio.TimeoutError:
+            context.code = grpc.StatusCode.DEADLINE_EXCEEDED
+            context.details = "Deadline Exceeded"
+        except grpc.aio.AbortError:
+            pass
+        except Exception as e:
+            context.code = grpc.StatusCode.UNKNOWN
+            context.details = f"Unexpected {type(e)}: {e}"
+        raise context.rpc_error()
+
+    async def _stream(
+        self,
+        context: FakeServicerContext,
+        stream: AsyncGenerator[Any, None],
+        timeout: float | None,
+        decode: Callable[[Any], Any],
+    ) -> AsyncGenerator[Any, None]:
+        # The deadline covers the whole call, but it is only enforced while waiting for the next
+        # response, so the time the caller spends between responses still counts against it.
+        deadline = asyncio.get_running_loop().time() + timeout if timeout is not None else None
+        try:
+            while True:
+                try:
+                    async with asyncio.timeout_at(deadline):
+                        response = await anext(stream)
+                except StopAsyncIteration:
+                    return
+                yield decode(response)
+        except TimeoutError:
+            context.code = grpc.StatusCode.DEADLINE_EXCEEDED
+            context.details = "Deadline Exceeded"
+        except grpc.aio.AbortError:
+            pass
+        except Exception as e:
+            context.code = grpc.StatusCode.UNKNOWN
+            context.details = f"Unexpected {type(e)}: {e}"
+        finally:
+            # Runs when the caller stops early or the deadline fires too, so the handler's own
+            # cleanup isn't left to garbage collection.
+            await stream.aclose()
+        raise context.rpc_error()
+
+    async def unary_unary(
+        self,
+        service_name: str,
+        method_name: str,
+        body: TestRequestBody,
+        *,
+        metadata: MetadataType = (),
+        timeout: float | None = None,
+        fields: Sequence[str] | None = None,
+        response_model: type[BaseGRPCSchema] | None = None,
+        response_format: TestResponseFormat | None = None,
+        with_call: bool = False,
+    ) -> Any:
+        handler, request_cls, response_cls = self._method(service_name, method_name)
+        if handler.unary_unary is None:
+            raise ValueError(f"{service_name}/{method_name} is not a unary-unary method")
+        context = FakeServicerContext(self._with_field_mask(metadata, fields), timeout)
+        request = self._encode_request(handler, request_cls, body)
+        response = await self._call(context, handler.unary_unary(request, context), timeout)
+        response = self._decode_response(handler, response_cls, response, response_model, response_format)
+        return (response, context) if with_call else response
+
+    def unary_stream(
+        self,
+        service_name: str,
+        method_name: str,
+        body: TestRequestBody,
+        *,
+        metadata: MetadataType = (),
+        timeout: float | None = None,
+        fields: Sequence[str] | None = None,
+        response_model: type[BaseGRPCSchema] | None = None,
+        response_format: TestResponseFormat | None = None,
+    ) -> "TestStreamCall":
+        handler, request_cls, response_cls = self._method(service_name, method_name)
+        if handler.unary_stream is None:
+            raise ValueError(f"{service_name}/{method_name} is not a unary-stream method")
+        context = FakeServicerContext(self._with_field_mask(metadata, fields), timeout)
+        request = self._encode_request(handler, request_cls, body)
+        stream = handler.unary_stream(request, context)
+
+        def decode(response: Any) -> Any:
+            return self._decode_response(handler, response_cls, response, response_model, response_format)
+
+        call = TestStreamCall(context, self._stream(context, stream, timeout, decode))
+        self._streams.add(call)
+        return call
+
+    async def stream_unary(
+        self,
+        service_name: str,
+        method_name: str,
+        body_stream: AsyncIterator[TestRequestBody],
+        *,
+        metadata: MetadataType = (),
+        timeout: float | None = None,
+        fields: Sequence[str] | None = None,
+        response_model: type[BaseGRPCSchema] | None = None,
+        response_format: TestResponseFormat | None = None,
+        with_call: bool = False,
+    ) -> Any:
+        handler, request_cls, response_cls = self._method(service_name, method_name)
+        if handler.stream_unary is None:
+            raise ValueError(f"{service_name}/{method_name} is not a stream-unary method")
+        context = FakeServicerContext(self._with_field_mask(metadata, fields), timeout)
+        requests = self._request_stream(handler, request_cls, body_stream)
+        response = await self._call(context, handler.stream_unary(requests, context), timeout)
+        response = self._decode_response(handler, response_cls, response, response_model, response_format)
+        return (response, context) if with_call else response
+
+    def stream_stream(
+        self,
+        service_name: str,
+        method_name: str,
+        body_stream: AsyncIterator[TestRequestBody],
+        *,
+        metadata: MetadataType = (),
+        timeout: float | None = None,
+        fields: Sequence[str] | None = None,
+        response_model: type[BaseGRPCSchema] | None = None,
+        response_format: TestResponseFormat | None = None,
+    ) -> "TestStreamCall":
+        handler, request_cls, response_cls = self._method(service_name, method_name)
+        if handler.stream_stream is None:
+            raise ValueError(f"{service_name}/{method_name} is not a stream-stream method")
+        context = FakeServicerContext(self._with_field_mask(metadata, fields), timeout)
+        requests = self._request_stream(handler, request_cls, body_stream)
+        stream = handler.stream_stream(requests, context)
+
+        def decode(response: Any) -> Any:
+            return self._decode_response(handler, response_cls, response, response_model, response_format)
+
+        call = TestStreamCall(context, self._stream(context, stream, timeout, decode))
+        self._streams.add(call)
+        return call
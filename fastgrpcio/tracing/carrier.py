@@ -0,0 +1,15 @@
+from typing import Any
+
+from opentelemetry.propagate import get_global_textmap
+
+_cached: tuple[Any, frozenset[str]] | None = None
+
+
+def carrier_keys() -> frozenset[str]:
+    # The global propagator can be replaced after clients and middlewares are created, e.g. by
+    # instrumentation set up later, so the keys are cached per propagator rather than captured once.
+    global _cached
+    propagator = get_global_textmap()
+    if _cached is None or _cached[0] is not propagator:
+        _cached = (propagator, frozenset(propagator.fields))
+    return _cached[1]
@@ -4,35 +4,45 @@ from typing import Any, AsyncIterator, Awaitable, Callable, Literal
 from google.protobuf.message import Message
 try:
     from opentelemetry import trace
+    from opentelemetry.context import Context as TraceContext
     from opentelemetry.propagate import extract, inject
     from opentelemetry.sdk.trace import TracerProvider
-    from opentelemetry.trace import INVALID_SPAN, Span
+    from opentelemetry.trace import Span, SpanKind
 except ImportError:
     raise ImportError(
         "opentelemetry-sdk is required to use TracingMiddleware. "
         "Please install it with 'pip install fastgrpcio[otel]'"
     )
 
-from fastgrpcio.context import ContextWrapper
+from fastgrpcio.context import Context
 from fastgrpcio.middlewares import BaseMiddleware
 from fastgrpcio.schemas import BaseGRPCSchema
+from fastgrpcio.tracing.carrier import carrier_keys
 
 
 class TracingMiddleware(BaseMiddleware):
 
-    def __init__(self, tracer_provider: TracerProvider) -> None:
+    def __init__(self, tracer_provider: TracerProvider, stream_events: bool = False) -> None:
         self.tracer_provider = tracer_provider
+        self.tracer = tracer_provider.get_tracer(__name__)
+        self.stream_events = stream_events
 
-    def _start_root_if_needed(self, ctx: trace.Context, tracer: trace.Tracer) -> tuple[trace.Context, dict[str, str]]:
-        current_span: Span = trace.get_current_span(context=ctx)
-        metadata: dict[str, str] = {}
+    def _extract_context(self, context: Context) -> TraceContext | None:
+        metadata = context.metadata
+        carrier = {key: metadata[key] for key in carrier_keys() if key in metadata}
+        if not carrier:
+            return None
+        return extract(carrier)
 
-        if current_span.get_span_context() == INVALID_SPAN.get_span_context():
-            with tracer.start_as_current_span("RootTrace") as root_span:
-                root_ctx = trace.set_span_in_context(root_span)
-                inject(metadata, context=root_ctx)
-                return root_ctx, metadata
-        return ctx, metadata
+    @staticmethod
+    def _propagate(span: Span, context: Context) -> None:
+        carrier: dict[str, str] = {}
+        inject(carrier, context=trace.set_span_in_context(span))
+        context.update_trace_context(carrier)
+
+    @staticmethod
+    def _add_message_event(span: Span, message_type: str, message_id: int) -> None:
+        span.add_event("message", {"message.type": message_type, "message.id": message_id})
 
     @staticmethod
     def _set_rpc_attributes(
@@ -48,8 +58,8 @@ class TracingMiddleware(BaseMiddleware):
     async def handle_unary(
         self,
         request: Message,
-        context: ContextWrapper,
-        call_next: Callable[[Any, ContextWrapper], Awaitable[Any]],
+        context: Context,
+        call_next: Callable[[Any, Context], Awaitable[Any]],
         user_func: Callable[..., Any],
         request_model: type[BaseGRPCSchema],
         response_class: type[BaseGRPCSchema],
@@ -59,21 +69,23 @@ class TracingMiddleware(BaseMiddleware):
         app_package_name: str = "",
         func_name: str = "",
     ) -> Any:
-        carrier: dict[str, str] = dict(context._context.invocation_metadata())
-        ctx = extract(carrier)
-        tracer = self.tracer_provider.get_tracer(__name__)
-        ctx, _ = self._start_root_if_needed(ctx, tracer)
+        ctx = self._extract_context(context)
+
+        with self.tracer.start_as_current_span(
+            f"{app_package_name}/{app_name}/{func_name}", context=ctx, kind=SpanKind.SERVER
+        ) as span:
+            if not span.is_recording():
+                return await call_next(request, context)
 
-        with tracer.start_as_current_span(f"{app_package_name}/{app_name}/{func_name}", context=ctx) as span:
             self._set_rpc_attributes(span, func_name, app_name, app_package_name)
-            inject(context._trace_ctx, context=trace.set_span_in_context(span))
+            self._propagate(span, context)
             return await call_next(request, context)
 
     async def handle_client_stream(
         self,
         request: AsyncIterator[Message],
-        context: ContextWrapper,
-        call_next: Callable[[AsyncIterator[Any], ContextWrapper], Awaitable[Any]],
+        context: Context,
+        call_next: Callable[[AsyncIterator[Any], Context], Awaitable[Any]],
         user_func: Callable[..., Any],
         request_model: type[BaseGRPCSchema],
         response_class: type[BaseGRPCSchema],
@@ -83,17 +95,24 @@ class TracingMiddleware(BaseMiddleware):
         app_package_name: str = "",
         func_name: str = "",
     ) -> Any:
-        carrier = dict(context._context.invocation_metadata())
-        ctx = extract(carrier)
-        tracer = self.tracer_provider.get_tracer(__name__)
-        ctx, _ = self._start_root_if_needed(ctx, tracer)
+        ctx = self._extract_context(context)
+
+        with self.tracer.start_as_current_span(
+            f"{app_package_name}/{app_name}/{func_name}", context=ctx, kind=SpanKind.SERVER
+        ) as span:
+            if not span.is_recording():
+                return await call_next(request, context)
 
-        with tracer.start_as_current_span(f"{app_package_name}/{app_name}/{func_name}", context=ctx) as span:
             self._set_rpc_attributes(span, func_name, app_name, app_package_name)
-            inject(context._trace_ctx, context=trace.set_span_in_context(span))
+            self._propagate(span, context)
+            if not self.stream_events:
+                return await call_next(request, context)
 
             async def wrapped_stream() -> AsyncIterator[Any]:
+                message_id = 0
                 async for msg in request:
+                    message_id += 1
+                    self._add_message_event(span, "RECEIVED", message_id)
                     yield msg
 
             return await call_next(wrapped_stream(), context)
@@ -101,8 +120,8 @@ class TracingMiddleware(BaseMiddleware):
     async def handle_stream(
         self,
         request: Message,
-        context: ContextWrapper,
-        call_next: Callable[[Any, ContextWrapper], AsyncIterator[Message]],
+        context: Context,
+        call_next: Callable[[Any, Context], AsyncIterator[Message]],
         user_func: Callable[..., Any],
         request_model: type[BaseGRPCSchema],
         response_class: type[BaseGRPCSchema],
@@ -112,14 +131,23 @@ class TracingMiddleware(BaseMiddleware):
         app_package_name: str = "",
         func_name: str = "",
     ) -> AsyncIterator[Message]:
-        carrier = dict(context._context.invocation_metadata())
-        ctx = extract(carrier)
-        tracer = self.tracer_provider.get_tracer(__name__)
-        ctx, _ = self._start_root_if_needed(ctx, tracer)
-
-        with tracer.start_as_current_span(f"{app_package_name}/{app_name}/{func_name}", context=ctx) as span:
-            self._set_rpc_attributes(span, func_name, app_name, app_package_name)
-            inject(context._trace_ctx, context=trace.set_span_in_context(span))
-
+        ctx = self._extract_context(context)
+
+        with self.tracer.start_as_current_span(
+            f"{app_package_name}/{app_name}/{func_name}", context=ctx, kind=SpanKind.SERVER
+        ) as span:
+            recording = span.is_recording()
+            if recording:
+                self._set_rpc_attributes(span, func_name, app_name, app_package_name)
+                self._propagate(span, context)
+
+            if not (recording and self.stream_events):
+                async for response in call_next(request, context):
+                    yield response
+                return
+
+            message_id = 0
             async for response in call_next(request, context):
+                message_id += 1
+                self._add_message_event(span, "SENT", message_id)
                 yield response